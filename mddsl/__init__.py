@@ -5,8 +5,8 @@ MedDSL-Lite: Medical Domain Specific Language for Diabetic Retinopathy Triage
 __version__ = "0.1.0"
 __author__ = "MedDSL Team"
 
-from .dsl_parser import parse, eval_expr, ParseError
-from .interpreter import execute
+from .dsl_parser import parse, eval_expr, eval_expr_batch, compile_expr, ParseError
+from .interpreter import execute, execute_batch, compile_dsl
 from .validator import validate_case, lint_rules
 from .explainer import explain
 from .retrieval import SnippetRetriever
@@ -14,8 +14,12 @@ from .retrieval import SnippetRetriever
 __all__ = [
     "parse",
     "eval_expr", 
+    "eval_expr_batch",
+    "compile_expr",
     "ParseError",
     "execute",
+    "execute_batch",
+    "compile_dsl",
     "validate_case",
     "lint_rules",
     "explain",
@@ -0,0 +1,100 @@
+"""
+Numba kernels for batch evaluation of MedDSL-Lite expressions.
+
+Expressions are encoded as postfix bytecode (one opcode and one float64
+argument per instruction) and run row by row over float64 field columns.
+Null values are stored as NaN. and/or short-circuit: a jump instruction
+whose operand already decides the result skips the remaining operands.
+
+Importing this module imports Numba, so dsl_parser only imports it on the
+first batch evaluation; the opcodes themselves live in _opcodes.
+"""
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # Numba is optional; callers fall back to NumPy/scalar paths
+    np = None
+    njit = None
+
+from ._opcodes import (
+    OP_CONST, OP_NULL, OP_FIELD, OP_NOT, OP_JUMP_IF_FALSE, OP_JUMP_IF_TRUE,
+    OP_EQ, OP_NE, OP_GE, OP_GT, OP_LE, OP_BOOL,
+)
+
+HAVE_NUMBA = njit is not None
+
+
+if HAVE_NUMBA:
+    @njit(cache=True, boundscheck=False)
+    def _truthy(value):
+        # Null (NaN) is falsy, as None is in Python
+        return value == value and value != 0.0
+
+    @njit(cache=True, boundscheck=False)
+    def run(opcodes, args, cols, n_rows, out):
+        """Evaluate the bytecode once per row, writing booleans into out."""
+        n_ops = opcodes.shape[0]
+        stack = np.empty(n_ops, dtype=np.float64)
+        for row in range(n_rows):
+            sp = 0
+            pc = 0
+            while pc < n_ops:
+                op = opcodes[pc]
+                if op == OP_CONST:
+                    stack[sp] = args[pc]
+                    sp += 1
+                elif op == OP_NULL:
+                    stack[sp] = np.nan
+                    sp += 1
+                elif op == OP_FIELD:
+                    stack[sp] = cols[int(args[pc]), row]
+                    sp += 1
+                elif op == OP_NOT:
+                    stack[sp - 1] = 0.0 if _truthy(stack[sp - 1]) else 1.0
+                elif op == OP_BOOL:
+                    stack[sp - 1] = 1.0 if _truthy(stack[sp - 1]) else 0.0
+                elif op == OP_JUMP_IF_FALSE:
+                    if _truthy(stack[sp - 1]):
+                        sp -= 1
+                    else:
+                        stack[sp - 1] = 0.0
+                        pc = int(args[pc])
+                        continue
+                elif op == OP_JUMP_IF_TRUE:
+                    if _truthy(stack[sp - 1]):
+                        stack[sp - 1] = 1.0
+                        pc = int(args[pc])
+                        continue
+                    sp -= 1
+                else:
+                    right = stack[sp - 1]
+                    left = stack[sp - 2]
+                    sp -= 1
+                    left_null = left != left
+                    right_null = right != right
+                    if op == OP_EQ:
+                        if left_null or right_null:
+                            result = left_null and right_null
+                        else:
+                            result = left == right
+                    elif op == OP_NE:
+                        if left_null or right_null:
+                            result = not (left_null and right_null)
+                        else:
+                            result = left != right
+                    elif left_null or right_null:
+                        result = False
+                    elif op == OP_GE:
+                        result = left >= right
+                    elif op == OP_GT:
+                        result = left > right
+                    elif op == OP_LE:
+                        result = left <= right
+                    else:  # OP_LT, the only comparison left
+                        result = left < right
+                    stack[sp - 1] = 1.0 if result else 0.0
+                pc += 1
+            out[row] = _truthy(stack[0])
+else:
+    run = None
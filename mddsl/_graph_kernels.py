@@ -0,0 +1,96 @@
+"""
+Numba kernels for linting large MedDSL node graphs.
+
+Graphs are passed in CSR form: node IDs are mapped to positions 0..n-1, and
+the neighbors of node i are indices[indptr[i]:indptr[i + 1]], in link order.
+"""
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # Numba is optional; the validator falls back to pure Python
+    np = None
+    njit = None
+
+HAVE_NUMBA = njit is not None
+
+
+if HAVE_NUMBA:
+    @njit(cache=True, boundscheck=False)
+    def tarjan_scc(indptr, indices, n):
+        """
+        Label each node with its strongly connected component.
+
+        Iterative Tarjan; roots and neighbors are visited in index order, so
+        component labels follow the same completion order as the Python
+        implementation.
+        """
+        index = np.full(n, -1, dtype=np.int32)
+        lowlink = np.zeros(n, dtype=np.int32)
+        on_stack = np.zeros(n, dtype=np.bool_)
+        comp = np.full(n, -1, dtype=np.int32)
+        scc_stack = np.empty(n, dtype=np.int32)
+        work_node = np.empty(n, dtype=np.int32)
+        work_edge = np.empty(n, dtype=np.int32)
+        counter = 0
+        n_comp = 0
+        sp = 0
+
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = counter
+            lowlink[root] = counter
+            counter += 1
+            scc_stack[sp] = root
+            sp += 1
+            on_stack[root] = True
+            work_node[0] = root
+            work_edge[0] = indptr[root]
+            wp = 1
+
+            while wp > 0:
+                node = work_node[wp - 1]
+                edge = work_edge[wp - 1]
+                descended = False
+                while edge < indptr[node + 1]:
+                    neighbor = indices[edge]
+                    edge += 1
+                    if index[neighbor] < 0:
+                        # Resume this node's edges after the child finishes
+                        work_edge[wp - 1] = edge
+                        index[neighbor] = counter
+                        lowlink[neighbor] = counter
+                        counter += 1
+                        scc_stack[sp] = neighbor
+                        sp += 1
+                        on_stack[neighbor] = True
+                        work_node[wp] = neighbor
+                        work_edge[wp] = indptr[neighbor]
+                        wp += 1
+                        descended = True
+                        break
+                    if on_stack[neighbor] and index[neighbor] < lowlink[node]:
+                        lowlink[node] = index[neighbor]
+                if descended:
+                    continue
+
+                wp -= 1
+                if wp > 0:
+                    parent = work_node[wp - 1]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+
+                if lowlink[node] == index[node]:
+                    while True:
+                        sp -= 1
+                        member = scc_stack[sp]
+                        on_stack[member] = False
+                        comp[member] = n_comp
+                        if member == node:
+                            break
+                    n_comp += 1
+
+        return comp
+else:
+    tarjan_scc = None
@@ -0,0 +1,20 @@
+"""
+Opcodes for the MedDSL-Lite batch bytecode.
+
+Kept apart from _expr_kernels so that emitting bytecode does not import
+Numba.
+"""
+
+OP_CONST = 0   # push args[i]
+OP_NULL = 1    # push null (NaN)
+OP_FIELD = 2   # push cols[int(args[i]), row]
+OP_NOT = 3
+OP_JUMP_IF_FALSE = 4   # if top is falsy: top = 0.0, goto int(args[i]); else pop
+OP_JUMP_IF_TRUE = 5    # if top is truthy: top = 1.0, goto int(args[i]); else pop
+OP_EQ = 6
+OP_NE = 7
+OP_GE = 8
+OP_GT = 9
+OP_LE = 10
+OP_LT = 11
+OP_BOOL = 12           # top = 1.0 if top is truthy else 0.0
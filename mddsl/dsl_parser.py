@@ -3,47 +3,96 @@ Safe boolean expression parser and evaluator for MedDSL-Lite.
 Implements a Pratt parser for boolean expressions with field references.
 """
 
+import operator as _op
 import re
-from typing import Any, Dict, List, Union
-from enum import Enum
-
-
-class TokenType(Enum):
-    # Literals
-    TRUE = "true"
-    FALSE = "false"
-    NULL = "null"
-    NUMBER = "number"
-    IDENTIFIER = "identifier"
-    
-    # Operators
-    AND = "and"
-    OR = "or"
-    NOT = "not"
-    EQ = "=="
-    NE = "!="
-    GE = ">="
-    GT = ">"
-    LE = "<="
-    LT = "<"
-    
-    # Delimiters
-    LPAREN = "("
-    RPAREN = ")"
-    DOT = "."
-    
-    # Special
-    EOF = "eof"
-
-
-class Token:
-    def __init__(self, type_: TokenType, value: Any = None, position: int = 0):
-        self.type = type_
-        self.value = value
-        self.position = position
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Final, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batch evaluation
+    np = None
+
+from . import _opcodes
+
+
+# Token types are plain ints so that comparisons and dict/tuple lookups in
+# the tokenizer and parser loops avoid Enum.__eq__/__hash__ overhead.
+
+# Literals
+TT_TRUE: Final[int] = 0
+TT_FALSE: Final[int] = 1
+TT_NULL: Final[int] = 2
+TT_NUMBER: Final[int] = 3
+TT_STRING: Final[int] = 4
+TT_IDENTIFIER: Final[int] = 5
+
+# Operators
+TT_AND: Final[int] = 6
+TT_OR: Final[int] = 7
+TT_NOT: Final[int] = 8
+# Comparison operators must stay contiguous (TT_EQ..TT_LT)
+TT_EQ: Final[int] = 9
+TT_NE: Final[int] = 10
+TT_GE: Final[int] = 11
+TT_GT: Final[int] = 12
+TT_LE: Final[int] = 13
+TT_LT: Final[int] = 14
+
+# Delimiters
+TT_LPAREN: Final[int] = 15
+TT_RPAREN: Final[int] = 16
+TT_DOT: Final[int] = 17
+
+# Special
+TT_EOF: Final[int] = 18
+
+NUM_TOKEN_TYPES: Final[int] = 19
+
+# Display names used in error messages
+_TT_NAME = {
+    TT_TRUE: "true",
+    TT_FALSE: "false",
+    TT_NULL: "null",
+    TT_NUMBER: "number",
+    TT_STRING: "string",
+    TT_IDENTIFIER: "identifier",
+    TT_AND: "and",
+    TT_OR: "or",
+    TT_NOT: "not",
+    TT_EQ: "==",
+    TT_NE: "!=",
+    TT_GE: ">=",
+    TT_GT: ">",
+    TT_LE: "<=",
+    TT_LT: "<",
+    TT_LPAREN: "(",
+    TT_RPAREN: ")",
+    TT_DOT: ".",
+    TT_EOF: "eof",
+}
+
+# Binding power per token type, indexed directly by the int constant;
+# anything that is not an operator binds with 0 and ends an expression
+_PRECEDENCE = [0] * NUM_TOKEN_TYPES
+_PRECEDENCE[TT_OR] = 1
+_PRECEDENCE[TT_AND] = 2
+for _tt in (TT_EQ, TT_NE, TT_GE, TT_GT, TT_LE, TT_LT):
+    _PRECEDENCE[_tt] = 3
+_PRECEDENCE[TT_NOT] = 4
+_PRECEDENCE = tuple(_PRECEDENCE)
+
+
+class Token(NamedTuple):
+    # A tuple rather than an object with a __dict__: cheap to build, and the
+    # parser can unpack it in one step
+    type: int
+    value: Any = None
+    position: int = 0
     
     def __repr__(self):
-        return f"Token({self.type.value}, {self.value})"
+        return f"Token({_TT_NAME[self.type]}, {self.value})"
 
 
 class ParseError(Exception):
@@ -54,124 +103,182 @@ class ParseError(Exception):
 
 
 class Parser:
-    """Pratt parser for boolean expressions."""
+    """Pratt parser for boolean expressions.
+    
+    The cursor is threaded through the parse methods as a local `pos`
+    rather than kept on the instance; each method takes the position of
+    its first token and returns the position after what it consumed.
+    """
     
     def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.pos = 0
-        self.current = tokens[0] if tokens else Token(TokenType.EOF)
-    
-    def advance(self):
-        """Move to next token."""
-        if self.pos < len(self.tokens) - 1:
-            self.pos += 1
-            self.current = self.tokens[self.pos]
-    
-    def peek(self) -> Token:
-        """Look at next token without advancing."""
-        if self.pos < len(self.tokens) - 1:
-            return self.tokens[self.pos + 1]
-        return Token(TokenType.EOF)
-    
-    def expect(self, token_type: TokenType) -> Token:
+        # The tokenizer always terminates the stream with EOF, which no
+        # rule consumes, so the cursor never runs off the end
+        self.tokens = tokens if tokens else [Token(TT_EOF)]
+    
+    def expect(self, pos: int, token_type: int) -> Tuple[Token, int]:
         """Expect and consume a token of given type."""
-        if self.current.type == token_type:
-            token = self.current
-            self.advance()
-            return token
-        raise ParseError(f"Expected {token_type.value}, got {self.current.type.value}", self.current.position)
+        token = self.tokens[pos]
+        if token.type == token_type:
+            return token, pos + 1
+        raise ParseError(f"Expected {_TT_NAME[token_type]}, got {_TT_NAME[token.type]}", token.position)
     
-    def parse_expression(self, precedence: int = 0) -> 'ASTNode':
+    def parse_expression(self, pos: int = 0, precedence: int = 0) -> Tuple['ASTNode', int]:
         """Parse expression with given precedence."""
-        left = self.parse_prefix()
+        tokens = self.tokens
+        left, pos = self.parse_prefix(pos)
         
-        while precedence < self.get_precedence(self.current.type):
-            left = self.parse_infix(left, self.current.type)
+        ttype = tokens[pos].type
+        while precedence < _PRECEDENCE[ttype]:
+            left, pos = self.parse_infix(left, pos)
+            ttype = tokens[pos].type
         
-        return left
+        return left, pos
     
-    def parse_prefix(self) -> 'ASTNode':
+    def parse_prefix(self, pos: int) -> Tuple['ASTNode', int]:
         """Parse prefix expressions."""
-        token = self.current
+        tokens = self.tokens
+        ttype, value, position = tokens[pos]
+        pos += 1
         
-        if token.type == TokenType.TRUE:
-            self.advance()
-            return BooleanNode(True)
-        elif token.type == TokenType.FALSE:
-            self.advance()
-            return BooleanNode(False)
-        elif token.type == TokenType.NULL:
-            self.advance()
-            return NullNode()
-        elif token.type == TokenType.NUMBER:
-            self.advance()
-            return NumberNode(token.value)
-        elif token.type == TokenType.IDENTIFIER:
-            self.advance()
-            return FieldNode(token.value)
-        elif token.type == TokenType.NOT:
-            self.advance()
-            expr = self.parse_expression(self.get_precedence(TokenType.NOT))
-            return NotNode(expr)
-        elif token.type == TokenType.LPAREN:
-            self.advance()
-            expr = self.parse_expression(0)
-            self.expect(TokenType.RPAREN)
-            return expr
+        if ttype == TT_IDENTIFIER:
+            path = value
+            # Dotted paths are normally a single token; a path written with
+            # spaces around its dots arrives as IDENTIFIER (DOT IDENTIFIER)*
+            while tokens[pos].type == TT_DOT:
+                part, pos = self.expect(pos + 1, TT_IDENTIFIER)
+                path += "." + part.value
+            return FieldNode(path), pos
+        elif ttype == TT_NUMBER:
+            return NumberNode(value), pos
+        elif ttype == TT_STRING:
+            return StringNode(value), pos
+        elif ttype == TT_TRUE:
+            return BooleanNode(True), pos
+        elif ttype == TT_FALSE:
+            return BooleanNode(False), pos
+        elif ttype == TT_NULL:
+            return NullNode(), pos
+        elif ttype == TT_NOT:
+            expr, pos = self.parse_expression(pos, _PRECEDENCE[TT_NOT])
+            return NotNode(expr), pos
+        elif ttype == TT_LPAREN:
+            expr, pos = self.parse_expression(pos, 0)
+            _, pos = self.expect(pos, TT_RPAREN)
+            return expr, pos
         else:
-            raise ParseError(f"Unexpected token: {token.type.value}", token.position)
+            raise ParseError(f"Unexpected token: {_TT_NAME[ttype]}", position)
     
-    def parse_infix(self, left: 'ASTNode', token_type: TokenType) -> 'ASTNode':
+    def parse_infix(self, left: 'ASTNode', pos: int) -> Tuple['ASTNode', int]:
         """Parse infix expressions."""
-        if token_type in [TokenType.EQ, TokenType.NE, TokenType.GE, TokenType.GT, TokenType.LE, TokenType.LT]:
-            self.advance()
-            right = self.parse_expression(self.get_precedence(token_type))
-            return ComparisonNode(left, token_type, right)
-        elif token_type == TokenType.AND:
-            self.advance()
-            right = self.parse_expression(self.get_precedence(TokenType.AND))
-            return AndNode(left, right)
-        elif token_type == TokenType.OR:
-            self.advance()
-            right = self.parse_expression(self.get_precedence(TokenType.OR))
-            return OrNode(left, right)
+        ttype, _, position = self.tokens[pos]
+        pos += 1
+        
+        if TT_EQ <= ttype <= TT_LT:
+            right, pos = self.parse_expression(pos, _PRECEDENCE[ttype])
+            return ComparisonNode(left, ttype, right), pos
+        elif ttype == TT_AND:
+            right, pos = self.parse_expression(pos, _PRECEDENCE[TT_AND])
+            return AndNode(left, right), pos
+        elif ttype == TT_OR:
+            right, pos = self.parse_expression(pos, _PRECEDENCE[TT_OR])
+            return OrNode(left, right), pos
         else:
-            raise ParseError(f"Unexpected infix operator: {token_type.value}", self.current.position)
+            raise ParseError(f"Unexpected infix operator: {_TT_NAME[ttype]}", position)
     
     @staticmethod
-    def get_precedence(token_type: TokenType) -> int:
+    def get_precedence(token_type: int) -> int:
         """Get operator precedence."""
-        precedences = {
-            TokenType.OR: 1,
-            TokenType.AND: 2,
-            TokenType.EQ: 3,
-            TokenType.NE: 3,
-            TokenType.GE: 3,
-            TokenType.GT: 3,
-            TokenType.LE: 3,
-            TokenType.LT: 3,
-            TokenType.NOT: 4,
-        }
-        return precedences.get(token_type, 0)
+        return _PRECEDENCE[token_type]
+
+
+_COMPARISON_FUNCS = {
+    TT_EQ: _op.eq,
+    TT_NE: _op.ne,
+    TT_GE: _op.ge,
+    TT_GT: _op.gt,
+    TT_LE: _op.le,
+    TT_LT: _op.lt,
+}
+
+# Sentinel distinguishing an absent field from a field explicitly set to null
+_MISSING = object()
+
+
+class _Unvectorizable(Exception):
+    """Raised when an AST cannot be translated to NumPy operations."""
+    pass
 
 
 class ASTNode:
     """Base AST node."""
+    # Static evaluation cost, used to order chain operands cheapest first
+    cost = 0
+    # True when evaluation can fail only by reporting a missing field
+    total = True
+    # True when eval always returns a bool, so callers can skip bool()
+    RETURNS_BOOL = False
+    
     def eval(self, case: Dict[str, Any]) -> Any:
         raise NotImplementedError
+    
+    def fold(self) -> 'ASTNode':
+        """Return an equivalent node with constant subtrees collapsed."""
+        return self
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        """Return Python source evaluating this node against a case `c`.
+        
+        With `reads` set, field reads are emitted as bare subscripts that
+        raise KeyError/TypeError instead of ParseError; see _compile_callable.
+        """
+        raise NotImplementedError
+    
+    def emit_vec(self) -> str:
+        """Return NumPy source evaluating this node over a column dict `cols`."""
+        raise _Unvectorizable(type(self).__name__)
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        """Return the split paths of all fields referenced by this node."""
+        return set()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        """Append postfix bytecode for the batch kernel, numbering fields."""
+        raise _Unvectorizable(type(self).__name__)
 
 
 class BooleanNode(ASTNode):
+    RETURNS_BOOL = True
+    
     def __init__(self, value: bool):
         self.value = value
     
     def eval(self, case: Dict[str, Any]) -> bool:
         return self.value
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return "True" if self.value else "False"
+    
+    def emit_vec(self) -> str:
+        return self.emit()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        opcodes.append(_opcodes.OP_CONST)
+        args.append(float(self.value))
 
 
 class NullNode(ASTNode):
     def eval(self, case: Dict[str, Any]) -> None:
         return None
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return "None"
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        opcodes.append(_opcodes.OP_NULL)
+        args.append(0.0)
 
 
 class NumberNode(ASTNode):
@@ -180,76 +287,517 @@ class NumberNode(ASTNode):
     
     def eval(self, case: Dict[str, Any]) -> Union[int, float]:
         return self.value
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return repr(self.value)
+    
+    def emit_vec(self) -> str:
+        # NumPy compares ints against float columns as float64, so larger
+        # integers would compare equal to their rounded neighbours
+        if type(self.value) is int and abs(self.value) > _MAX_EXACT_INT:
+            raise _Unvectorizable("integer literal beyond float64 precision")
+        return self.emit()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        # Checked before the float() conversion, which would round 2**53 + 1
+        # down to a value that passes the bound
+        if type(self.value) is int and abs(self.value) > _MAX_EXACT_INT:
+            raise _Unvectorizable("integer literal beyond float64 precision")
+        opcodes.append(_opcodes.OP_CONST)
+        args.append(float(self.value))
+
+
+class StringNode(ASTNode):
+    def __init__(self, value: str):
+        self.value = value
+    
+    def eval(self, case: Dict[str, Any]) -> str:
+        return self.value
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return repr(self.value)
+
+
+@lru_cache(maxsize=1024)
+def _split_path(path: str) -> Tuple[str, ...]:
+    """Split a dotted field path into interned parts, once per distinct path."""
+    return tuple(sys.intern(part) for part in path.split('.'))
 
 
 class FieldNode(ASTNode):
     def __init__(self, path: str):
         self.path = path
+        # Split once at parse time; eval walks the tuple for every case.
+        # Interned parts hit the identity fast path when the case's keys
+        # are interned too (e.g. dicts built from literals or other rules).
+        self.parts = _split_path(path)
+        self.cost = len(self.parts)
     
     def eval(self, case: Dict[str, Any]) -> Any:
-        return get_field_value(case, self.path)
+        # Subscript straight through and let a missing key (KeyError) or a
+        # non-mapping value along the path (TypeError) report the field
+        try:
+            for part in self.parts:
+                case = case[part]
+            return case
+        except (KeyError, TypeError):
+            raise ParseError(f"Field not found: {self.path}") from None
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        if reads is not None:
+            return reads.read(self.parts)
+        return f"_get(c, {self.parts!r}, {self.path!r})"
+    
+    def emit_vec(self) -> str:
+        return f"cols[{self.parts!r}]"
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return {self.parts}
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        opcodes.append(_opcodes.OP_FIELD)
+        args.append(float(fields.setdefault(self.parts, len(fields))))
 
 
 class NotNode(ASTNode):
+    RETURNS_BOOL = True
+    
     def __init__(self, expr: ASTNode):
         self.expr = expr
+        self.cost = 1 + expr.cost
+        self.total = expr.total
     
     def eval(self, case: Dict[str, Any]) -> bool:
-        return not bool(self.expr.eval(case))
+        return not self.expr.eval(case)
+    
+    def fold(self) -> ASTNode:
+        expr = self.expr.fold()
+        if isinstance(expr, _LITERAL_NODES):
+            return BooleanNode(not expr.eval({}))
+        return NotNode(expr)
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return f"(not {self.expr.emit(reads)})"
+    
+    def emit_vec(self) -> str:
+        return f"np.logical_not({self.expr.emit_vec()})"
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return self.expr.collect_fields()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        self.expr.emit_ops(opcodes, args, fields)
+        opcodes.append(_opcodes.OP_NOT)
+        args.append(0.0)
+
+
+class _FieldReads:
+    """
+    Inline field reads for one compiled function, with repeats bound once.
+    
+    A path numbered in `bind` is assigned to a local with `:=` on its first
+    read and reused afterwards, so `x.y > 1 and x.y < 5` walks the case
+    once. Reuse is only sound where the first read has certainly run: both
+    sides of a comparison always do, but of an and/or only the first operand
+    does, so later operands emit into a fork whose bindings are dropped.
+    Every read is counted, which lets a first pass find the repeated paths.
+    """
+    
+    def __init__(self, bind: Dict[Tuple[str, ...], int], counts: Dict[Tuple[str, ...], int],
+                 bound: Optional[Set[Tuple[str, ...]]] = None):
+        self.bind = bind
+        self.counts = counts
+        self.bound = set() if bound is None else bound
+    
+    def fork(self) -> '_FieldReads':
+        return _FieldReads(self.bind, self.counts, set(self.bound))
+    
+    def read(self, parts: Tuple[str, ...]) -> str:
+        self.counts[parts] = self.counts.get(parts, 0) + 1
+        source = "c" + "".join(f"[{part!r}]" for part in parts)
+        slot = self.bind.get(parts)
+        if slot is None:
+            return source
+        # Each path has one local however many branches bind it
+        if parts in self.bound:
+            return f"_f{slot}"
+        self.bound.add(parts)
+        return f"(_f{slot} := {source})"
+
+
+def _emit_bool(node: ASTNode, reads: Optional[_FieldReads] = None) -> str:
+    """Return source for `node` coerced to bool, skipping bool() if possible."""
+    source = node.emit(reads)
+    return source if node.RETURNS_BOOL else f"bool({source})"
+
+
+def _emit_chain(operands: Sequence[ASTNode], joiner: str,
+                reads: Optional[_FieldReads]) -> str:
+    """Return source joining short-circuit operands with `joiner`."""
+    if reads is None:
+        return "(" + joiner.join(_emit_bool(node) for node in operands) + ")"
+    # Only the first operand always runs; each later one runs only after
+    # all of its predecessors, so they share one fork in order
+    first = _emit_bool(operands[0], reads)
+    rest = reads.fork()
+    return "(" + joiner.join([first] + [_emit_bool(node, rest) for node in operands[1:]]) + ")"
+
+
+def _emit_chain_ops(operands: Sequence[ASTNode], jump: int, opcodes: List[int],
+                    args: List[float], fields: Dict[Tuple[str, ...], int]) -> None:
+    """
+    Append short-circuit bytecode for and/or operands.
+    
+    Each operand but the last is followed by `jump`, which skips to the end
+    once that operand decides the result; the last is coerced to a bool.
+    """
+    jumps = []
+    for node in operands[:-1]:
+        node.emit_ops(opcodes, args, fields)
+        jumps.append(len(opcodes))
+        opcodes.append(jump)
+        args.append(0.0)
+    operands[-1].emit_ops(opcodes, args, fields)
+    opcodes.append(_opcodes.OP_BOOL)
+    args.append(0.0)
+    for index in jumps:
+        args[index] = float(len(opcodes))
 
 
 class AndNode(ASTNode):
+    """Binary `and` as built by the parser; parse() folds runs into AndChainNode."""
+    RETURNS_BOOL = True
+    
     def __init__(self, left: ASTNode, right: ASTNode):
         self.left = left
         self.right = right
     
     def eval(self, case: Dict[str, Any]) -> bool:
         return bool(self.left.eval(case)) and bool(self.right.eval(case))
+    
+    def fold(self) -> ASTNode:
+        # `a and b and c` parses as AndNode(AndNode(a, b), c); walk that left
+        # spine iteratively so long chains neither recurse nor copy operands
+        operands = []
+        node = self
+        while isinstance(node, AndNode):
+            operands.append(node.right)
+            node = node.left
+        result = node.fold()
+        for right in reversed(operands):
+            result = _fold_and(result, right.fold())
+        if isinstance(result, AndChainNode):
+            result.children = _order_by_cost(result.children)
+        return result
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return _emit_chain((self.left, self.right), " and ", reads)
+    
+    def emit_vec(self) -> str:
+        return f"np.logical_and({self.left.emit_vec()}, {self.right.emit_vec()})"
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return self.left.collect_fields() | self.right.collect_fields()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        _emit_chain_ops((self.left, self.right), _opcodes.OP_JUMP_IF_FALSE, opcodes, args, fields)
 
 
 class OrNode(ASTNode):
+    """Binary `or` as built by the parser; parse() folds runs into OrChainNode."""
+    RETURNS_BOOL = True
+    
     def __init__(self, left: ASTNode, right: ASTNode):
         self.left = left
         self.right = right
     
     def eval(self, case: Dict[str, Any]) -> bool:
         return bool(self.left.eval(case)) or bool(self.right.eval(case))
+    
+    def fold(self) -> ASTNode:
+        # Same iterative spine walk as AndNode.fold
+        operands = []
+        node = self
+        while isinstance(node, OrNode):
+            operands.append(node.right)
+            node = node.left
+        result = node.fold()
+        for right in reversed(operands):
+            result = _fold_or(result, right.fold())
+        if isinstance(result, OrChainNode):
+            result.children = _order_by_cost(result.children)
+        return result
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return _emit_chain((self.left, self.right), " or ", reads)
+    
+    def emit_vec(self) -> str:
+        return f"np.logical_or({self.left.emit_vec()}, {self.right.emit_vec()})"
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return self.left.collect_fields() | self.right.collect_fields()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        _emit_chain_ops((self.left, self.right), _opcodes.OP_JUMP_IF_TRUE, opcodes, args, fields)
+
+
+class AndChainNode(ASTNode):
+    """Flattened run of `and` operands, evaluated in a loop instead of recursion."""
+    RETURNS_BOOL = True
+    
+    def __init__(self, children: List[ASTNode]):
+        self.children = children
+    
+    @property
+    def cost(self) -> int:
+        return sum(child.cost for child in self.children)
+    
+    @property
+    def total(self) -> bool:
+        return all(child.total for child in self.children)
+    
+    def eval(self, case: Dict[str, Any]) -> bool:
+        for child in self.children:
+            if not child.eval(case):
+                return False
+        return True
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return _emit_chain(self.children, " and ", reads)
+    
+    def emit_vec(self) -> str:
+        source = self.children[0].emit_vec()
+        for child in self.children[1:]:
+            source = f"np.logical_and({source}, {child.emit_vec()})"
+        return source
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return set().union(*(child.collect_fields() for child in self.children))
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        _emit_chain_ops(self.children, _opcodes.OP_JUMP_IF_FALSE, opcodes, args, fields)
+
+
+class OrChainNode(ASTNode):
+    """Flattened run of `or` operands, evaluated in a loop instead of recursion."""
+    RETURNS_BOOL = True
+    
+    def __init__(self, children: List[ASTNode]):
+        self.children = children
+    
+    @property
+    def cost(self) -> int:
+        return sum(child.cost for child in self.children)
+    
+    @property
+    def total(self) -> bool:
+        return all(child.total for child in self.children)
+    
+    def eval(self, case: Dict[str, Any]) -> bool:
+        for child in self.children:
+            if child.eval(case):
+                return True
+        return False
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        return _emit_chain(self.children, " or ", reads)
+    
+    def emit_vec(self) -> str:
+        source = self.children[0].emit_vec()
+        for child in self.children[1:]:
+            source = f"np.logical_or({source}, {child.emit_vec()})"
+        return source
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return set().union(*(child.collect_fields() for child in self.children))
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        _emit_chain_ops(self.children, _opcodes.OP_JUMP_IF_TRUE, opcodes, args, fields)
+
+
+def _order_by_cost(children: List[ASTNode]) -> List[ASTNode]:
+    """Sort chain operands cheapest first where the order is unobservable.
+    
+    A missing field or an ordering comparison on mismatched types raises,
+    so operands can only swap places when neither can raise anything but
+    the same missing-field error: consecutive total operands reading one
+    and the same field. Each such run is sorted stably by cost.
+    """
+    ordered: List[ASTNode] = []
+    run: List[ASTNode] = []
+    run_fields: Optional[Set[Tuple[str, ...]]] = None
+    for child in children:
+        fields = child.collect_fields() if child.total else None
+        if fields is not None and len(fields) == 1 and fields == run_fields:
+            run.append(child)
+            continue
+        ordered.extend(sorted(run, key=lambda node: node.cost))
+        run = [child]
+        run_fields = fields if fields is not None and len(fields) == 1 else None
+    ordered.extend(sorted(run, key=lambda node: node.cost))
+    return ordered
+
+
+def _fold_and(left: ASTNode, right: ASTNode) -> ASTNode:
+    """Combine two folded `and` operands, applying constant identities."""
+    if isinstance(left, _LITERAL_NODES):
+        if not left.eval({}):
+            return BooleanNode(False)
+        if isinstance(right, _LITERAL_NODES):
+            return BooleanNode(bool(right.eval({})))
+        if isinstance(right, _BOOLEAN_NODES):
+            return right
+    # A constant on the right may only drop out when it is truthy: the
+    # left side still has to run so that missing fields are reported.
+    elif isinstance(right, _LITERAL_NODES) and right.eval({}):
+        if isinstance(left, _BOOLEAN_NODES):
+            return left
+    
+    # A chain on the left was created by the fold in progress, so it can
+    # be extended in place
+    chain = left if isinstance(left, AndChainNode) else AndChainNode([left])
+    if isinstance(right, AndChainNode):
+        chain.children.extend(right.children)
+    else:
+        chain.children.append(right)
+    return chain
+
+
+def _fold_or(left: ASTNode, right: ASTNode) -> ASTNode:
+    """Combine two folded `or` operands, applying constant identities."""
+    if isinstance(left, _LITERAL_NODES):
+        if left.eval({}):
+            return BooleanNode(True)
+        if isinstance(right, _LITERAL_NODES):
+            return BooleanNode(bool(right.eval({})))
+        if isinstance(right, _BOOLEAN_NODES):
+            return right
+    # Mirror of _fold_and: only a falsy constant on the right is dropped
+    elif isinstance(right, _LITERAL_NODES) and not right.eval({}):
+        if isinstance(left, _BOOLEAN_NODES):
+            return left
+    
+    chain = left if isinstance(left, OrChainNode) else OrChainNode([left])
+    if isinstance(right, OrChainNode):
+        chain.children.extend(right.children)
+    else:
+        chain.children.append(right)
+    return chain
 
 
 class ComparisonNode(ASTNode):
-    def __init__(self, left: ASTNode, operator: TokenType, right: ASTNode):
+    RETURNS_BOOL = True
+    
+    def __init__(self, left: ASTNode, operator: int, right: ASTNode):
         self.left = left
         self.operator = operator
         self.right = right
+        # Bind the comparison once so eval() does not re-dispatch on the operator
+        self._op = _COMPARISON_FUNCS.get(operator)
+        if self._op is None:
+            raise ParseError(f"Unknown comparison operator: {_TT_NAME[operator]}")
+        # ==/!= already give null == null and null != value; ordering does not
+        self._null_safe = operator in (TT_EQ, TT_NE)
+        self.cost = 1 + left.cost + right.cost
+        # Ordering comparisons raise TypeError on mismatched operand types
+        self.total = self._null_safe and left.total and right.total
     
     def eval(self, case: Dict[str, Any]) -> bool:
         left_val = self.left.eval(case)
         right_val = self.right.eval(case)
         
-        # Handle null comparisons
-        if left_val is None or right_val is None:
-            if self.operator == TokenType.EQ:
-                return left_val is None and right_val is None
-            elif self.operator == TokenType.NE:
-                return left_val is not None or right_val is not None
-            else:
-                return False
+        # Ordering comparisons involving null are always false
+        if not self._null_safe and (left_val is None or right_val is None):
+            return False
         
-        # Numeric comparisons
-        if self.operator == TokenType.EQ:
-            return left_val == right_val
-        elif self.operator == TokenType.NE:
-            return left_val != right_val
-        elif self.operator == TokenType.GE:
-            return left_val >= right_val
-        elif self.operator == TokenType.GT:
-            return left_val > right_val
-        elif self.operator == TokenType.LE:
-            return left_val <= right_val
-        elif self.operator == TokenType.LT:
-            return left_val < right_val
-        else:
-            raise ParseError(f"Unknown comparison operator: {self.operator.value}")
+        return self._op(left_val, right_val)
+    
+    def fold(self) -> ASTNode:
+        left = self.left.fold()
+        right = self.right.fold()
+        node = ComparisonNode(left, self.operator, right)
+        if isinstance(left, _LITERAL_NODES) and isinstance(right, _LITERAL_NODES):
+            try:
+                return BooleanNode(node.eval({}))
+            except TypeError:
+                # e.g. 'a' < 1: leave the error to evaluation time
+                return node
+        return node
+    
+    def emit(self, reads: Optional['_FieldReads'] = None) -> str:
+        left = self.left.emit(reads)
+        right = self.right.emit(reads)
+        # Python's ==/!= already match the DSL's null semantics; ordering
+        # operators go through helpers that return False on null operands
+        if self.operator == TT_EQ:
+            return f"({left} == {right})"
+        if self.operator == TT_NE:
+            return f"({left} != {right})"
+        return f"{_ORDERING_HELPERS[self.operator]}({left}, {right})"
+    
+    def emit_vec(self) -> str:
+        # Columns are only built when every value is numeric, so no null
+        # handling is needed and the operator maps straight onto NumPy
+        return f"({self.left.emit_vec()} {_TT_NAME[self.operator]} {self.right.emit_vec()})"
+    
+    def collect_fields(self) -> Set[Tuple[str, ...]]:
+        return self.left.collect_fields() | self.right.collect_fields()
+    
+    def emit_ops(self, opcodes: List[int], args: List[float],
+                 fields: Dict[Tuple[str, ...], int]) -> None:
+        self.left.emit_ops(opcodes, args, fields)
+        self.right.emit_ops(opcodes, args, fields)
+        opcodes.append(_COMPARISON_OPCODES[self.operator])
+        args.append(0.0)
+
+
+# Nodes whose value does not depend on the case
+_LITERAL_NODES = (BooleanNode, NullNode, NumberNode, StringNode)
+
+# Nodes whose eval() already returns a bool, so they can replace a logical
+# node without changing the result type
+_BOOLEAN_NODES = (BooleanNode, NotNode, AndNode, OrNode, AndChainNode, OrChainNode, ComparisonNode)
+
+
+# Master token pattern: whitespace is skipped, and exactly one of the
+# groups (symbol, dotted word, number, quoted string, stray character)
+# matches each token.
+_TOKEN_RE = re.compile(
+    r'\s+'
+    r'|(==|!=|>=|<=|[<>().])'
+    r'|([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)'
+    r'|([0-9]+(?:\.[0-9]+)?)'
+    r"|'([^']*)'|\"([^\"]*)\""
+    r'|(.)'
+)
+
+_SYMBOLS = {
+    '==': TT_EQ,
+    '!=': TT_NE,
+    '>=': TT_GE,
+    '<=': TT_LE,
+    '>': TT_GT,
+    '<': TT_LT,
+    '(': TT_LPAREN,
+    ')': TT_RPAREN,
+    '.': TT_DOT,
+}
+
+_KEYWORDS = {
+    'true': (TT_TRUE, True),
+    'false': (TT_FALSE, False),
+    'null': (TT_NULL, None),
+    'and': (TT_AND, None),
+    'or': (TT_OR, None),
+    'not': (TT_NOT, None),
+}
 
 
 class Tokenizer:
@@ -257,149 +805,339 @@ class Tokenizer:
     
     def __init__(self, text: str):
         self.text = text
-        self.pos = 0
     
     def tokenize(self) -> List[Token]:
-        """Tokenize the input text."""
+        """Tokenize the input text in a single regex scan."""
         tokens = []
+        append = tokens.append
         
-        while self.pos < len(self.text):
-            self.skip_whitespace()
-            if self.pos >= len(self.text):
-                break
+        for match in _TOKEN_RE.finditer(self.text):
+            group = match.lastindex
+            if group is None:
+                # Whitespace
+                continue
             
-            token = self.next_token()
-            if token:
-                tokens.append(token)
+            value = match.group(group)
+            position = match.start()
+            
+            if group == 1:
+                append(Token(_SYMBOLS[value], position=position))
+            elif group == 2:
+                keyword = _KEYWORDS.get(value)
+                if keyword is None:
+                    append(Token(TT_IDENTIFIER, value, position))
+                else:
+                    append(Token(keyword[0], keyword[1], position))
+            elif group == 3:
+                number = float(value) if '.' in value else int(value)
+                append(Token(TT_NUMBER, number, position))
+            elif group < 6:
+                append(Token(TT_STRING, value, position))
+            else:
+                raise ParseError(f"Unexpected character: {value}", position)
         
-        tokens.append(Token(TokenType.EOF, position=self.pos))
+        append(Token(TT_EOF, position=len(self.text)))
         return tokens
+
+
+def get_field_value(case: Dict[str, Any], path: str) -> Any:
+    """Get field value from case using dotted path notation."""
+    return _get(case, _split_path(path), path)
+
+
+# Parsed ASTs are cached by the raw expression string. Nodes never hold
+# case-dependent state, so a single tree can be shared across evaluations;
+# parse.cache_clear() empties the cache.
+@lru_cache(maxsize=1024)
+def parse(expr: str) -> ASTNode:
+    """Parse a boolean expression into an AST, reusing cached trees."""
+    return _parse_uncached(expr)
+
+
+def _parse_uncached(expr: str) -> ASTNode:
+    """Tokenize and parse an expression without consulting the cache."""
+    tokenizer = Tokenizer(expr)
+    tokens = tokenizer.tokenize()
+    parser = Parser(tokens)
     
-    def skip_whitespace(self):
-        """Skip whitespace characters."""
-        while self.pos < len(self.text) and self.text[self.pos].isspace():
-            self.pos += 1
+    ast, pos = parser.parse_expression()
+    last = parser.tokens[pos]
+    if last.type != TT_EOF:
+        raise ParseError(f"Unexpected token after expression: {_TT_NAME[last.type]}")
     
-    def next_token(self) -> Token:
-        """Get next token."""
-        char = self.text[self.pos]
-        
-        # Single character tokens
-        if char == '(':
-            self.pos += 1
-            return Token(TokenType.LPAREN, position=self.pos - 1)
-        elif char == ')':
-            self.pos += 1
-            return Token(TokenType.RPAREN, position=self.pos - 1)
-        elif char == '.':
-            self.pos += 1
-            return Token(TokenType.DOT, position=self.pos - 1)
-        
-        # Multi-character tokens
-        elif char in ['=', '!', '>', '<']:
-            return self.parse_comparison()
-        elif char.isalpha():
-            return self.parse_identifier()
-        elif char.isdigit():
-            return self.parse_number()
-        else:
-            raise ParseError(f"Unexpected character: {char}", self.pos)
+    return ast.fold()
+
+
+def _get(case: Dict[str, Any], parts: Tuple[str, ...], path: str) -> Any:
+    """Field lookup used by compiled expressions; see FieldNode.eval."""
+    try:
+        for part in parts:
+            case = case[part]
+        return case
+    except (KeyError, TypeError):
+        raise ParseError(f"Field not found: {path}") from None
+
+
+def _ge(left: Any, right: Any) -> bool:
+    return left is not None and right is not None and left >= right
+
+
+def _gt(left: Any, right: Any) -> bool:
+    return left is not None and right is not None and left > right
+
+
+def _le(left: Any, right: Any) -> bool:
+    return left is not None and right is not None and left <= right
+
+
+def _lt(left: Any, right: Any) -> bool:
+    return left is not None and right is not None and left < right
+
+
+_COMPARISON_OPCODES = {
+    TT_EQ: _opcodes.OP_EQ,
+    TT_NE: _opcodes.OP_NE,
+    TT_GE: _opcodes.OP_GE,
+    TT_GT: _opcodes.OP_GT,
+    TT_LE: _opcodes.OP_LE,
+    TT_LT: _opcodes.OP_LT,
+}
+
+_ORDERING_HELPERS = {
+    TT_GE: "_ge",
+    TT_GT: "_gt",
+    TT_LE: "_le",
+    TT_LT: "_lt",
+}
+
+_HELPERS = {"_get": _get, "_ge": _ge, "_gt": _gt, "_le": _le, "_lt": _lt}
+
+
+def _compile_callable(node: ASTNode, as_bool: bool) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Compile an AST into a Python function over a case `c`.
     
-    def parse_comparison(self) -> Token:
-        """Parse comparison operators."""
-        start_pos = self.pos
-        
-        if self.text[self.pos:self.pos+2] == '==':
-            self.pos += 2
-            return Token(TokenType.EQ, position=start_pos)
-        elif self.text[self.pos:self.pos+2] == '!=':
-            self.pos += 2
-            return Token(TokenType.NE, position=start_pos)
-        elif self.text[self.pos:self.pos+2] == '>=':
-            self.pos += 2
-            return Token(TokenType.GE, position=start_pos)
-        elif self.text[self.pos:self.pos+2] == '<=':
-            self.pos += 2
-            return Token(TokenType.LE, position=start_pos)
-        elif self.text[self.pos] == '>':
-            self.pos += 1
-            return Token(TokenType.GT, position=start_pos)
-        elif self.text[self.pos] == '<':
-            self.pos += 1
-            return Token(TokenType.LT, position=start_pos)
-        else:
-            raise ParseError(f"Invalid operator starting with {self.text[self.pos]}", self.pos)
+    Field reads are emitted as plain subscripts such as c['qc']['macula_view'].
+    If one raises KeyError or TypeError, the call is repeated through a
+    lambda that reads fields via _get, so a missing field still raises
+    ParseError and a genuine comparison TypeError is raised again unchanged.
+    Expressions have no side effects, so repeating the call is safe.
+    """
+    def body(reads: Optional[_FieldReads]) -> str:
+        return _emit_bool(node, reads) if as_bool else node.emit(reads)
     
-    def parse_identifier(self) -> Token:
-        """Parse identifiers and keywords."""
-        start_pos = self.pos
-        value = ""
-        
-        while self.pos < len(self.text) and (self.text[self.pos].isalnum() or self.text[self.pos] == '_'):
-            value += self.text[self.pos]
-            self.pos += 1
-        
-        # Check for keywords
-        if value == 'true':
-            return Token(TokenType.TRUE, True, start_pos)
-        elif value == 'false':
-            return Token(TokenType.FALSE, False, start_pos)
-        elif value == 'null':
-            return Token(TokenType.NULL, None, start_pos)
-        elif value == 'and':
-            return Token(TokenType.AND, position=start_pos)
-        elif value == 'or':
-            return Token(TokenType.OR, position=start_pos)
-        elif value == 'not':
-            return Token(TokenType.NOT, position=start_pos)
-        else:
-            return Token(TokenType.IDENTIFIER, value, start_pos)
+    safe = eval(compile(
+        "lambda c, _get=_get, _ge=_ge, _gt=_gt, _le=_le, _lt=_lt: " + body(None),
+        "<mddsl>", "eval"), dict(_HELPERS))
+    if not node.collect_fields():
+        return safe
     
-    def parse_number(self) -> Token:
-        """Parse numeric literals."""
-        start_pos = self.pos
-        value = ""
-        
-        while self.pos < len(self.text) and (self.text[self.pos].isdigit() or self.text[self.pos] == '.'):
-            value += self.text[self.pos]
-            self.pos += 1
+    # A first pass counts the reads; paths read more than once are bound
+    # to locals in the second so each case is walked once per path
+    counts: Dict[Tuple[str, ...], int] = {}
+    inline = body(_FieldReads({}, counts))
+    repeated = [parts for parts, n in counts.items() if n > 1]
+    if repeated:
+        inline = body(_FieldReads({parts: i for i, parts in enumerate(repeated)}, {}))
+    
+    source = (
+        "def fn(c, _safe=_safe, _ge=_ge, _gt=_gt, _le=_le, _lt=_lt):\n"
+        "    try:\n"
+        f"        return {inline}\n"
+        "    except (KeyError, TypeError):\n"
+        "        return _safe(c)\n"
+    )
+    namespace = dict(_HELPERS, _safe=safe)
+    exec(compile(source, "<mddsl>", "exec"), namespace)
+    return namespace["fn"]
+
+
+# Compiled callables are cached by the raw expression string and bounded
+# like parse(); compile_expr.cache_clear() empties the cache.
+@lru_cache(maxsize=1024)
+def compile_expr(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a boolean expression into a Python callable.
+    
+    The parsed AST is translated into a single Python function so that and/or
+    short-circuit natively instead of dispatching through eval() per node.
+    
+    Args:
+        expr: Boolean expression source
         
-        try:
-            if '.' in value:
-                return Token(TokenType.NUMBER, float(value), start_pos)
-            else:
-                return Token(TokenType.NUMBER, int(value), start_pos)
-        except ValueError:
-            raise ParseError(f"Invalid number: {value}", start_pos)
+    Returns:
+        Callable taking a case dictionary and returning a bool
+    """
+    return _compile_callable(parse(expr), as_bool=True)
 
 
-def get_field_value(case: Dict[str, Any], path: str) -> Any:
-    """Get field value from case using dotted path notation."""
-    parts = path.split('.')
-    current = case
+@lru_cache(maxsize=1024)
+def _compile_value(expr: str) -> Callable[[Dict[str, Any]], Any]:
+    """Compile the value-returning callable behind eval_expr()."""
+    # Same flat function as compile_expr, minus the final bool()
+    return _compile_callable(parse(expr), as_bool=False)
+
+
+def eval_expr(expr: str, case: Dict[str, Any]) -> Any:
+    """
+    Parse and evaluate an expression.
     
+    Returns the expression's value: a bool for comparisons and logical
+    operators, or the raw literal or field value otherwise. Use
+    compile_expr() for a callable that always returns a bool.
+    """
+    return _compile_value(expr)(case)
+
+
+# Vectorised callables are cached by the raw expression string; None marks
+# expressions that cannot be expressed as NumPy operations
+@lru_cache(maxsize=1024)
+def _compile_vec(expr: str) -> Optional[Callable[[Dict[Tuple[str, ...], Any]], Any]]:
+    """Compile an expression to a NumPy callable over field columns."""
     try:
+        source = f"lambda cols, np=np: {parse(expr).emit_vec()}"
+    except _Unvectorizable:
+        return None
+    return eval(compile(source, "<mddsl-vec>", "eval"), {"np": np})
+
+
+_NUMERIC_TYPES = (bool, int, float)
+
+# Largest integer magnitude that survives a round trip through float64
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _field_values(cases: Sequence[Dict[str, Any]], parts: Tuple[str, ...]) -> Optional[List[Any]]:
+    """Return one field's value for every case, or None if any case lacks it."""
+    values = []
+    append = values.append
+    for case in cases:
+        current = case
         for part in parts:
-            current = current[part]
-        return current
-    except (KeyError, TypeError):
-        raise ParseError(f"Field not found: {path}")
+            if not isinstance(current, dict):
+                return None
+            current = current.get(part, _MISSING)
+        if current is _MISSING:
+            return None
+        append(current)
+    return values
 
 
-def parse(expr: str) -> ASTNode:
-    """Parse a boolean expression into an AST."""
-    tokenizer = Tokenizer(expr)
-    tokens = tokenizer.tokenize()
-    parser = Parser(tokens)
+def _extract_columns(cases: Sequence[Dict[str, Any]],
+                     fields: Set[Tuple[str, ...]]) -> Optional[Dict[Tuple[str, ...], Any]]:
+    """
+    Gather each field into a NumPy column (AoS -> SoA).
     
-    ast = parser.parse_expression()
-    if parser.current.type != TokenType.EOF:
-        raise ParseError(f"Unexpected token after expression: {parser.current.type.value}")
+    Returns None when any value is missing, null or non-numeric; those
+    cases need the per-case evaluator for exact null and error semantics.
+    Integers too large for an exact float64 representation are declined
+    too, since a column mixing them with floats is stored as float64.
+    """
+    columns = {}
+    for parts in fields:
+        values = _field_values(cases, parts)
+        if values is None:
+            return None
+        for value in values:
+            value_type = type(value)
+            if value_type not in _NUMERIC_TYPES:
+                return None
+            if value_type is int and abs(value) > _MAX_EXACT_INT:
+                return None
+        column = np.array(values)
+        if column.dtype.kind not in "biuf":
+            return None
+        columns[parts] = column
+    return columns
+
+
+def _extract_float_columns(cases: Sequence[Dict[str, Any]],
+                           fields: Dict[Tuple[str, ...], int]) -> Optional[Any]:
+    """
+    Gather fields into a (n_fields, n_cases) float64 matrix for the kernel.
     
-    return ast
+    Nulls become NaN. Returns None for missing fields, non-numeric values,
+    NaN values (indistinguishable from null) and integers too large for an
+    exact float64 representation.
+    """
+    matrix = np.empty((len(fields), len(cases)), dtype=np.float64)
+    for parts, index in fields.items():
+        values = _field_values(cases, parts)
+        if values is None:
+            return None
+        for value in values:
+            if value is None:
+                continue
+            value_type = type(value)
+            if value_type is float:
+                if value != value:
+                    return None
+            elif value_type is int:
+                if abs(value) > _MAX_EXACT_INT:
+                    return None
+            elif value_type is not bool:
+                return None
+        matrix[index] = np.array(values, dtype=np.float64)
+    return matrix
+
+
+# Kernel bytecode is cached by the raw expression string; None marks
+# expressions the kernel cannot run
+@lru_cache(maxsize=1024)
+def _compile_bytecode(expr: str) -> Optional[Tuple[Any, Any, Dict[Tuple[str, ...], int]]]:
+    """Encode an expression as (opcodes, args, field_index) for the kernel."""
+    opcodes: List[int] = []
+    args: List[float] = []
+    fields: Dict[Tuple[str, ...], int] = {}
+    try:
+        parse(expr).emit_ops(opcodes, args, fields)
+    except _Unvectorizable:
+        return None
+    return (np.array(opcodes, dtype=np.int32),
+            np.array(args, dtype=np.float64),
+            fields)
 
 
-def eval_expr(expr: str, case: Dict[str, Any]) -> bool:
-    """Parse and evaluate a boolean expression."""
-    ast = parse(expr)
-    return bool(ast.eval(case))
+def eval_expr_batch(expr: str, cases: Sequence[Dict[str, Any]]) -> Any:
+    """
+    Evaluate one boolean expression against many cases.
+    
+    With Numba installed, numeric and null fields are packed into float64
+    columns and a compiled bytecode kernel evaluates every row. Otherwise,
+    when every referenced field is numeric in every case, the expression is
+    evaluated column-wise with NumPy. Anything else goes through the
+    compiled scalar evaluator one case at a time.
+    
+    Args:
+        expr: Boolean expression source
+        cases: Sequence of case dictionaries
+        
+    Returns:
+        Boolean NumPy array with one entry per case (a list of bools if
+        NumPy is not installed)
+    """
+    fn = compile_expr(expr)
+    if np is None:
+        return [fn(case) for case in cases]
+    
+    # Imported here so that callers who never evaluate batches never pay
+    # for importing Numba
+    from . import _expr_kernels as _kernels
+    if cases and _kernels.HAVE_NUMBA:
+        bytecode = _compile_bytecode(expr)
+        if bytecode is not None:
+            opcodes, args, fields = bytecode
+            matrix = _extract_float_columns(cases, fields)
+            if matrix is not None:
+                out = np.empty(len(cases), dtype=np.bool_)
+                _kernels.run(opcodes, args, matrix, len(cases), out)
+                return out
+    
+    vec_fn = _compile_vec(expr) if cases else None
+    if vec_fn is not None:
+        columns = _extract_columns(cases, parse(expr).collect_fields())
+        if columns is not None:
+            result = vec_fn(columns)
+            return np.broadcast_to(np.asarray(result, dtype=bool), (len(cases),)).copy()
+    
+    return np.fromiter((fn(case) for case in cases), dtype=bool, count=len(cases))
@@ -3,15 +3,54 @@ Explanation generator for MedDSL decisions and traces.
 """
 
 import json
-from typing import Any, Dict, List, Optional, Callable
-from .retrieval import SnippetRetriever
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Callable
+from .retrieval import SnippetRetriever, _default_retriever
+
+
+def _format_referral(action: Dict[str, Any]) -> str:
+    specialty = action.get("specialty", "unknown")
+    urgency = action.get("urgency", "routine")
+    return f"refer to {specialty} ({urgency})"
+
+
+def _format_test(action: Dict[str, Any]) -> str:
+    return f"order {action.get('test_type', 'unknown')}"
+
+
+def _format_followup(action: Dict[str, Any]) -> str:
+    return f"follow-up in {action.get('interval', 'unknown')}"
+
+
+def _format_abstain(action: Dict[str, Any]) -> str:
+    return f"abstain ({action.get('reason', 'insufficient data')})"
+
+
+# Read-only stand-in for missing nested case sections
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# Display formatters keyed by action type
+_ACTION_FORMATTERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "suggest_referral": _format_referral,
+    "order_test": _format_test,
+    "set_followup": _format_followup,
+    "abstain": _format_abstain,
+}
 
 
 class ExplanationGenerator:
-    """Generates explanations from case data, actions, and trace."""
+    """
+    Generates explanations from case data, actions, and trace.
+    
+    Without a retriever, the generator uses the process-wide default one
+    that retrieve_snippets() and search_snippets() share, so snippets added
+    to or removed from it change every such generator. Pass
+    create_retriever() for an independent index.
+    """
     
     def __init__(self, retriever: SnippetRetriever = None):
-        self.retriever = retriever or SnippetRetriever()
+        self.retriever = retriever or _default_retriever()
         self.llm_rewrite_func = None  # Will be set by user if LLM rewriting is desired
     
     def set_llm_rewrite_function(self, func: Callable[[str, str], str]):
@@ -32,32 +71,26 @@ class ExplanationGenerator:
         Returns:
             Dictionary containing explanation components
         """
+        return self.explain_lazy(case, actions, trace, retriever).to_dict()
+    
+    def explain_lazy(self, case: Dict[str, Any], actions: List[Dict[str, Any]],
+                     trace: List[Dict[str, Any]], retriever: SnippetRetriever = None) -> 'Explanation':
+        """
+        Like explain(), but build each component only when it is first read.
+        
+        Returns:
+            Read-only Explanation mapping with the same keys as explain()
+        """
         if retriever is None:
             retriever = self.retriever
-        
-        # Generate rule trace
-        rule_trace = self._generate_rule_trace(trace)
-        
-        # Generate actions JSON (exact actions list)
-        actions_json = actions
-        
-        # Generate citations
-        citations = self._generate_citations(trace, retriever)
-        
-        # Generate prose (with optional LLM rewrite)
-        prose = self._generate_prose(case, actions, trace, rule_trace, citations)
-        
-        return {
-            "rule_trace": rule_trace,
-            "actions_json": actions_json,
-            "citations": citations,
-            "prose": prose,
-            "case_summary": self._generate_case_summary(case)
-        }
+        return Explanation(self, case, actions, trace, retriever)
     
-    def _generate_rule_trace(self, trace: List[Dict[str, Any]]) -> List[str]:
+    def _generate_rule_trace(self, trace: List[Dict[str, Any]],
+                             labels_by_id: Optional[Dict[int, str]] = None) -> List[str]:
         """Generate bullet-point rule trace from execution trace."""
         rule_trace = []
+        if labels_by_id is None:
+            labels_by_id = {}
         
         for entry in trace:
             node_id = entry.get("node", "unknown")
@@ -77,14 +110,11 @@ class ExplanationGenerator:
                 # Format action outcomes
                 actions = entry.get("actions", [])
                 if actions:
-                    action_descriptions = []
-                    for action in actions:
-                        action_type = action.get("type", "unknown")
-                        action_desc = self._format_action(action)
-                        action_descriptions.append(action_desc)
-                    
-                    if action_descriptions:
-                        rule_trace.append(f"• {node_id}: {', '.join(action_descriptions)}")
+                    action_descriptions = [
+                        labels_by_id.get(id(action)) or self._format_action(action)
+                        for action in actions
+                    ]
+                    rule_trace.append(f"• {node_id}: {', '.join(action_descriptions)}")
                 else:
                     rule_trace.append(f"• {node_id}: no actions")
             
@@ -98,56 +128,46 @@ class ExplanationGenerator:
     def _format_action(self, action: Dict[str, Any]) -> str:
         """Format a single action for display."""
         action_type = action.get("type", "unknown")
+        formatter = _ACTION_FORMATTERS.get(action_type)
+        if formatter is not None:
+            return formatter(action)
         
-        if action_type == "suggest_referral":
-            specialty = action.get("specialty", "unknown")
-            urgency = action.get("urgency", "routine")
-            return f"refer to {specialty} ({urgency})"
-        
-        elif action_type == "order_test":
-            test_type = action.get("test_type", "unknown")
-            return f"order {test_type}"
-        
-        elif action_type == "set_followup":
-            interval = action.get("interval", "unknown")
-            return f"follow-up in {interval}"
-        
-        elif action_type == "abstain":
-            reason = action.get("reason", "insufficient data")
-            return f"abstain ({reason})"
-        
-        else:
-            # Generic formatting for unknown action types
-            return f"{action_type}: {json.dumps(action, separators=(',', ':'))}"
+        # Generic formatting for unknown action types
+        return f"{action_type}: {json.dumps(action, separators=(',', ':'))}"
     
     def _generate_citations(self, trace: List[Dict[str, Any]], retriever: SnippetRetriever) -> List[str]:
         """Generate citations from trace cite IDs."""
-        citation_ids = set()
+        citations = []
+        seen = set()
         
-        # Collect all citation IDs from trace
+        # Walk cite IDs in trace order and stop as soon as we have enough
         for entry in trace:
-            cite_ids = entry.get("cite", [])
-            citation_ids.update(cite_ids)
-        
-        # Retrieve citation snippets
-        citations = []
-        for cite_id in citation_ids:
-            snippet = retriever.get_snippet(cite_id)
-            if snippet and 'short_quote' in snippet:
-                source = snippet.get('source', 'Unknown source')
-                quote = snippet['short_quote']
-                citations.append(f"{source}: {quote}")
+            cite_ids = entry.get("cite")
+            if not cite_ids:
+                continue
+            
+            for cite_id in cite_ids:
+                if cite_id in seen:
+                    continue
+                seen.add(cite_id)
+                
+                snippet = retriever.get_snippet(cite_id)
+                if snippet and 'short_quote' in snippet:
+                    source = snippet.get('source', 'Unknown source')
+                    citations.append(f"{source}: {snippet['short_quote']}")
+                    # Limit to 2-3 citations as specified
+                    if len(citations) == 3:
+                        return citations
         
-        # Limit to 2-3 citations as specified
-        return citations[:3]
+        return citations
     
     def _generate_prose(self, case: Dict[str, Any], actions: List[Dict[str, Any]], 
                        trace: List[Dict[str, Any]], rule_trace: List[str], 
-                       citations: List[str]) -> str:
+                       citations: List[str], action_labels: Optional[List[str]] = None) -> str:
         """Generate prose explanation with optional LLM rewrite."""
         
         # Create template prose
-        template = self._create_template_prose(case, actions, rule_trace, citations)
+        template = self._create_template_prose(case, actions, rule_trace, citations, action_labels)
         
         # Apply LLM rewrite if function is available
         if self.llm_rewrite_func:
@@ -161,7 +181,8 @@ class ExplanationGenerator:
         return template
     
     def _create_template_prose(self, case: Dict[str, Any], actions: List[Dict[str, Any]], 
-                              rule_trace: List[str], citations: List[str]) -> str:
+                              rule_trace: List[str], citations: List[str],
+                              action_labels: Optional[List[str]] = None) -> str:
         """Create template prose without LLM rewriting."""
         
         # Case summary
@@ -175,46 +196,106 @@ class ExplanationGenerator:
             case_desc += ", vision reduced"
         
         # Action summary
-        if actions:
-            action_summaries = []
-            for action in actions:
-                action_summaries.append(self._format_action(action))
-            action_text = "; ".join(action_summaries)
+        if action_labels is not None:
+            action_text = "; ".join(action_labels) or "no actions recommended"
+        elif actions:
+            action_text = "; ".join(self._format_action(action) for action in actions)
         else:
             action_text = "no actions recommended"
         
-        # Combine into prose
+        # Combine into prose; section headers carry their own blank line
         prose_parts = [
             f"Based on the clinical data ({case_desc}), the following recommendation is made: {action_text}.",
-            "",
-            "Rule trace:",
-            *[f"  {bullet}" for bullet in rule_trace]
+            "\nRule trace:",
         ]
+        prose_parts.extend(f"  {bullet}" for bullet in rule_trace)
         
         if citations:
-            prose_parts.extend([
-                "",
-                "Citations:",
-                *[f"  {citation}" for citation in citations]
-            ])
+            prose_parts.append("\nCitations:")
+            prose_parts.extend(f"  {citation}" for citation in citations)
         
         return "\n".join(prose_parts)
     
     def _generate_case_summary(self, case: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a summary of the case data."""
+        macula = case.get("macula") or _EMPTY
+        qc = case.get("qc") or _EMPTY
         return {
             "eye": case.get("eye"),
             "age": case.get("age"),
             "vision_reduced": case.get("vision_reduced"),
             "dr_grade": case.get("dr_grade"),
-            "edema_prob": case.get("macula", {}).get("edema_prob"),
+            "edema_prob": macula.get("edema_prob"),
             "qc_status": {
-                "fundus_pass": case.get("qc", {}).get("fundus_pass"),
-                "macula_view": case.get("qc", {}).get("macula_view")
+                "fundus_pass": qc.get("fundus_pass"),
+                "macula_view": qc.get("macula_view")
             }
         }
 
 
+class Explanation(Mapping[str, Any]):
+    """
+    Lazily built explanation components, as returned by explain_lazy().
+    
+    A read-only mapping with the same keys and values as the dictionary from
+    explain(), but each component is only generated the first time it is
+    read, so callers that only need `actions_json` never pay for the rule
+    trace, citations or prose. Use to_dict() for a plain, JSON-serializable
+    dictionary.
+    """
+    
+    _KEYS = ("rule_trace", "actions_json", "citations", "prose", "case_summary")
+    
+    def __init__(self, generator: 'ExplanationGenerator', case: Dict[str, Any],
+                 actions: List[Dict[str, Any]], trace: List[Dict[str, Any]],
+                 retriever: SnippetRetriever):
+        self._generator = generator
+        self._case = case
+        self._trace = trace
+        self._retriever = retriever
+        self.actions_json = actions
+    
+    @cached_property
+    def action_labels(self) -> List[str]:
+        # Format each action once; the trace references the same dicts
+        return [self._generator._format_action(action) for action in self.actions_json]
+    
+    @cached_property
+    def rule_trace(self) -> List[str]:
+        labels_by_id = {id(action): label
+                        for action, label in zip(self.actions_json, self.action_labels)}
+        return self._generator._generate_rule_trace(self._trace, labels_by_id)
+    
+    @cached_property
+    def citations(self) -> List[str]:
+        return self._generator._generate_citations(self._trace, self._retriever)
+    
+    @cached_property
+    def prose(self) -> str:
+        return self._generator._generate_prose(self._case, self.actions_json, self._trace,
+                                               self.rule_trace, self.citations,
+                                               self.action_labels)
+    
+    @cached_property
+    def case_summary(self) -> Dict[str, Any]:
+        return self._generator._generate_case_summary(self._case)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialise every component into a plain dictionary."""
+        return {key: getattr(self, key) for key in self._KEYS}
+
+
 def llm_rewrite_stub(text: str, style: str = "clinician") -> str:
     """Stub function for LLM rewriting."""
     # This is a placeholder - in practice, this would call an actual LLM
@@ -236,8 +317,18 @@ def explain(case: Dict[str, Any], actions: List[Dict[str, Any]],
     Returns:
         Dictionary containing explanation components
     """
-    generator = ExplanationGenerator(retriever)
-    return generator.explain(case, actions, trace, retriever)
+    return ExplanationGenerator(retriever).explain(case, actions, trace, retriever)
+
+
+def explain_lazy(case: Dict[str, Any], actions: List[Dict[str, Any]],
+                 trace: List[Dict[str, Any]], retriever: SnippetRetriever = None) -> Explanation:
+    """
+    Like explain(), but build each component only when it is first read.
+    
+    Returns:
+        Read-only Explanation mapping with the same keys as explain()
+    """
+    return ExplanationGenerator(retriever).explain_lazy(case, actions, trace, retriever)
 
 
 def explain_with_llm(case: Dict[str, Any], actions: List[Dict[str, Any]], 
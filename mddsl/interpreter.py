@@ -4,10 +4,15 @@ DSL interpreter with tracing and safety mechanisms.
 
 import hashlib
 import json
-import yaml
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
-from .dsl_parser import eval_expr, ParseError
+from .dsl_parser import compile_expr, eval_expr, ParseError
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; json.dumps produces the same bytes
+    orjson = None
 
 
 class InterpreterError(Exception):
@@ -15,57 +20,97 @@ class InterpreterError(Exception):
     pass
 
 
-class TraceEntry:
-    """Represents a single trace entry."""
-    
-    def __init__(self, node_id: str, node_type: str, outcome: Optional[str] = None, 
-                 actions: Optional[List[Dict]] = None, cite: Optional[List[str]] = None,
-                 profile: str = "", version: str = "", rule_hash: str = "", timestamp: str = ""):
-        self.node_id = node_id
-        self.node_type = node_type
-        self.outcome = outcome
-        self.actions = actions or []
-        self.cite = cite or []
-        self.profile = profile
-        self.version = version
-        self.rule_hash = rule_hash
-        self.timestamp = timestamp
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return {
-            "node": self.node_id,
-            "type": self.node_type,
-            "outcome": self.outcome,
-            "actions": self.actions,
-            "cite": self.cite,
-            "profile": self.profile,
-            "version": self.version,
-            "rule_hash": self.rule_hash,
-            "timestamp": self.timestamp
-        }
+def _mk_trace(node_id: str, node_type: str, interp: 'DSLInterpreter', *,
+              outcome: Optional[str] = None, actions: Optional[List[Dict]] = None,
+              cite: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Build a trace entry stamped with the run's metadata."""
+    return {
+        "node": node_id,
+        "type": node_type,
+        "outcome": outcome,
+        "actions": actions or [],
+        "cite": cite or [],
+        "profile": interp.profile,
+        "version": interp.version,
+        "rule_hash": interp.rule_hash,
+        "timestamp": interp.timestamp
+    }
 
 
-def canonicalize_and_hash(dsl_dict: Dict[str, Any]) -> str:
-    """Canonicalize DSL dictionary and compute SHA-256 hash."""
-    # Create a deep copy and sort keys recursively
-    canonical = canonicalize_dict(dsl_dict)
-    
-    # Convert to JSON string with sorted keys
-    canonical_json = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+def _mk_safety_stop(interp: 'DSLInterpreter', code: str,
+                    detail: Optional[Exception] = None) -> Dict[str, Any]:
+    """
+    Build a safety-stop trace entry.
     
-    # Compute hash
-    return hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()
+    Only these entries carry `outcome_code`, which holds just the stop
+    reason: one of cycle_detected, missing_node, max_iterations_exceeded,
+    interpreter_error or unexpected_error. `outcome` adds the error
+    message, if any.
+    """
+    outcome = code if detail is None else f"{code}: {detail}"
+    entry = _mk_trace("safety_stop", "safety_stop", interp, outcome=outcome)
+    entry["outcome_code"] = code
+    return entry
 
 
-def canonicalize_dict(obj: Any) -> Any:
-    """Recursively canonicalize a dictionary by sorting keys."""
-    if isinstance(obj, dict):
-        return {k: canonicalize_dict(v) for k, v in sorted(obj.items())}
-    elif isinstance(obj, list):
-        return [canonicalize_dict(item) for item in obj]
-    else:
-        return obj
+# The rule hash fingerprints rules for versioning and audit traces; it is
+# not a defence against adversarial inputs, so the faster BLAKE2b is used
+RULE_HASH_ALGORITHM = "blake2b"
+RULE_HASH_DIGEST_SIZE = 32
+
+
+# orjson output can differ from json.dumps() only at non-ASCII characters
+# and DEL (which json escapes), at float exponents and floats below 1e-4
+# (which repr writes with an exponent), and at bare nulls (which orjson
+# also writes for NaN and infinity). Matches inside strings only cost a
+# fallback to json.dumps(). The table collapses digits, exponent letters and
+# the bytes that can precede a value so each family needs one search.
+_DIVERGENT_CLASSES = bytes.maketrans(b"123456789E:[", b"000000000e,,")
+
+
+def _same_as_json(canonical: bytes) -> bool:
+    """Return True if orjson output is known to match json.dumps()."""
+    # Plain substring tests run in C; a regex over the whole document
+    # costs more than the encoding it is meant to save
+    if not canonical.isascii() or b"\x7f" in canonical or b"0.0000" in canonical:
+        return False
+    classes = canonical.translate(_DIVERGENT_CLASSES)
+    return b"0e" not in classes and b",null" not in classes
+
+
+# Types orjson would serialize but json.dumps() rejects are passed through
+# to a missing default, so both encoders fail on the same inputs
+_ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    if orjson is not None else 0
+)
+
+
+def _canonical_json(dsl_dict: Dict[str, Any]) -> bytes:
+    """Serialize a DSL dictionary to its canonical JSON form."""
+    if orjson is not None:
+        try:
+            canonical = orjson.dumps(dsl_dict, option=_ORJSON_OPTIONS)
+        except TypeError:  # e.g. non-string keys or integers over 64 bits
+            pass
+        else:
+            if _same_as_json(canonical):
+                return canonical
+    # sort_keys orders every nested mapping during the single C-level
+    # encoding pass, so no sorted copy of the tree is needed first
+    return json.dumps(dsl_dict, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _hash_canonical(canonical_json: bytes) -> str:
+    """Compute the rule hash of an already canonicalized DSL."""
+    return hashlib.new(RULE_HASH_ALGORITHM, canonical_json,
+                       digest_size=RULE_HASH_DIGEST_SIZE).hexdigest()
+
+
+def canonicalize_and_hash(dsl_dict: Dict[str, Any]) -> str:
+    """Canonicalize DSL dictionary and compute its BLAKE2b-256 hash."""
+    return _hash_canonical(_canonical_json(dsl_dict))
 
 
 class DSLInterpreter:
@@ -75,6 +120,11 @@ class DSLInterpreter:
         self.rule_hash = ""
         self.profile = ""
         self.version = ""
+        # One timestamp per run, shared by every trace entry; rules finish
+        # in microseconds, so per-entry clock reads add cost, not information
+        self.timestamp = datetime.now().isoformat()
+        # Precompiled decision conditions keyed by node ID
+        self.when_fns: Dict[str, Callable[[Dict[str, Any]], bool]] = {}
     
     def validate_node_structure(self, node: Dict[str, Any]) -> None:
         """Validate that a node has the required structure."""
@@ -99,17 +149,17 @@ class DSLInterpreter:
             if "when" in node:
                 raise InterpreterError(f"Action node {node['id']} should not have 'when' field")
     
-    def get_node_by_id(self, nodes: List[Dict[str, Any]], node_id: str) -> Optional[Dict[str, Any]]:
-        """Find a node by its ID."""
-        for node in nodes:
-            if node.get("id") == node_id:
-                return node
-        return None
+    def get_node_by_id(self, nodes_by_id: Dict[str, Dict[str, Any]], node_id: str) -> Optional[Dict[str, Any]]:
+        """Find a node by its ID in a map built by compile_dsl()."""
+        return nodes_by_id.get(node_id)
     
-    def evaluate_condition(self, condition: str, case: Dict[str, Any]) -> bool:
-        """Evaluate a boolean condition."""
+    def evaluate_condition(self, condition: str, case: Dict[str, Any],
+                           when_fn: Optional[Callable[[Dict[str, Any]], bool]] = None) -> bool:
+        """Evaluate a boolean condition, using its compiled form if given."""
         try:
-            return eval_expr(condition, case)
+            if when_fn is not None:
+                return when_fn(case)
+            return bool(eval_expr(condition, case))
         except ParseError as e:
             raise InterpreterError(f"Failed to evaluate condition '{condition}': {e}")
         except Exception as e:
@@ -124,19 +174,12 @@ class DSLInterpreter:
         
         if node_type == "decision":
             condition = node["when"]
-            outcome = self.evaluate_condition(condition, case)
+            outcome = self.evaluate_condition(condition, case, self.when_fns.get(node_id))
             
             # Add trace entry for decision
-            trace_entry = TraceEntry(
-                node_id=node_id,
-                node_type=node_type,
-                outcome="true" if outcome else "false",
-                cite=node.get("cite", []),
-                profile=self.profile,
-                version=self.version,
-                rule_hash=self.rule_hash,
-                timestamp=datetime.now().isoformat()
-            )
+            trace_entry = _mk_trace(node_id, node_type, self,
+                                    outcome="true" if outcome else "false",
+                                    cite=node.get("cite"))
             
             # Determine next node based on outcome
             if outcome and "goto_true" in node:
@@ -152,16 +195,8 @@ class DSLInterpreter:
             actions = node.get("actions", [])
             
             # Add trace entry for action
-            trace_entry = TraceEntry(
-                node_id=node_id,
-                node_type=node_type,
-                actions=actions,
-                cite=node.get("cite", []),
-                profile=self.profile,
-                version=self.version,
-                rule_hash=self.rule_hash,
-                timestamp=datetime.now().isoformat()
-            )
+            trace_entry = _mk_trace(node_id, node_type, self,
+                                    actions=actions, cite=node.get("cite"))
             
             # Determine next node
             if "next" in node:
@@ -172,159 +207,277 @@ class DSLInterpreter:
         return actions, next_node, None
 
 
-def execute(dsl: Dict[str, Any], case: Dict[str, Any]) -> Tuple[List[Dict], List[Dict]]:
+# Successor markers in CompiledDSL.goto_true/goto_false: execution ends, or
+# the link names a node that does not exist
+_END = -1
+_MISSING = -2
+
+
+@dataclass(frozen=True)
+class CompiledDSL:
+    """A validated DSL with its rule hash and node map computed once."""
+    source: Dict[str, Any]
+    rule_hash: str
+    profile: str
+    version: str
+    nodes: List[Dict[str, Any]]
+    nodes_by_id: Dict[str, Dict[str, Any]]
+    node_index: Dict[str, int]
+    entry_node: Dict[str, Any]
+    entry_index: int
+    when_fns: Dict[str, Callable[[Dict[str, Any]], bool]]
+    # Successor position of each node when its condition holds or fails
+    # (action nodes store `next` in both), or _END/_MISSING
+    goto_true: List[int]
+    goto_false: List[int]
+    # when_fns entry of each node by position, None where there is none
+    conditions: List[Optional[Callable[[Dict[str, Any]], bool]]]
+
+
+# Recently compiled DSLs keyed by canonical JSON, so compiling a DSL with
+# the same content again (e.g. execute() on a freshly loaded dictionary)
+# only pays for serializing it
+_COMPILED_CACHE: Dict[bytes, CompiledDSL] = {}
+_COMPILED_CACHE_SIZE = 32
+
+
+def compile_dsl(dsl: Dict[str, Any]) -> CompiledDSL:
     """
-    Execute DSL rules on a case and return actions and trace.
+    Validate a DSL dictionary and precompute everything execute() needs.
+    
+    Compile once and pass the result to execute() when running many cases
+    against the same rules. The compiled form does not track later changes
+    to the source dictionary. Results are cached by content, so a DSL equal
+    to a recently compiled one returns the earlier CompiledDSL.
     
     Args:
         dsl: DSL dictionary with meta and nodes
-        case: Case data dictionary
         
     Returns:
-        Tuple of (actions_list, trace_list)
+        CompiledDSL for use with execute()
     """
-    interpreter = DSLInterpreter()
+    canonical_json = _canonical_json(dsl)
+    cached = _COMPILED_CACHE.get(canonical_json)
+    # The cached source may have been mutated since it was compiled
+    if cached is not None and cached.source == dsl:
+        return cached
     
-    # Extract metadata
+    interpreter = DSLInterpreter()
     meta = dsl.get("meta", {})
-    interpreter.profile = meta.get("profile", "")
-    interpreter.version = meta.get("version", "")
-    interpreter.rule_hash = canonicalize_and_hash(dsl)
     
     # Get nodes
     nodes = dsl.get("nodes", [])
     if not nodes:
         raise InterpreterError("No nodes found in DSL")
     
-    # Validate all nodes
-    node_ids = set()
-    for node in nodes:
+    # Validate all nodes, indexing them by ID in the same pass
+    nodes_by_id = {}
+    node_index = {}
+    for position, node in enumerate(nodes):
         interpreter.validate_node_structure(node)
         
         # Check for duplicate IDs
         node_id = node["id"]
-        if node_id in node_ids:
+        if node_id in nodes_by_id:
             raise InterpreterError(f"Duplicate node ID: {node_id}")
-        node_ids.add(node_id)
+        nodes_by_id[node_id] = node
+        node_index[node_id] = position
     
     # Find entry point
     entry_node_id = meta.get("entry")
     if entry_node_id:
-        current_node = interpreter.get_node_by_id(nodes, entry_node_id)
-        if not current_node:
+        entry_node = interpreter.get_node_by_id(nodes_by_id, entry_node_id)
+        if not entry_node:
             raise InterpreterError(f"Entry node '{entry_node_id}' not found")
     else:
         # Use first node as entry point
-        current_node = nodes[0]
+        entry_node = nodes[0]
+    entry_index = node_index[entry_node["id"]]
+    
+    # Resolve links to positions once, following execute_node(): a decision
+    # takes its branch if present, else `next`, and an empty link ends the run
+    def resolve(target: Any) -> int:
+        if not target:
+            return _END
+        try:
+            return node_index.get(target, _MISSING)
+        except TypeError:
+            return _MISSING
+    
+    goto_true = []
+    goto_false = []
+    for node in nodes:
+        if node["type"] == "decision":
+            fallback = node.get("next")
+            goto_true.append(resolve(node.get("goto_true", fallback)))
+            goto_false.append(resolve(node.get("goto_false", fallback)))
+        else:
+            position = resolve(node.get("next"))
+            goto_true.append(position)
+            goto_false.append(position)
+    
+    # Compile decision conditions up front. Conditions that fail to compile
+    # are left out and evaluated at run time, where the error becomes a
+    # safety stop as before.
+    when_fns = {}
+    for node in nodes:
+        if node["type"] == "decision":
+            try:
+                when_fns[node["id"]] = compile_expr(node["when"])
+            except Exception:
+                pass
+    
+    compiled = CompiledDSL(
+        source=dsl,
+        rule_hash=_hash_canonical(canonical_json),
+        profile=meta.get("profile", ""),
+        version=meta.get("version", ""),
+        nodes=nodes,
+        nodes_by_id=nodes_by_id,
+        node_index=node_index,
+        entry_node=entry_node,
+        entry_index=entry_index,
+        when_fns=when_fns,
+        goto_true=goto_true,
+        goto_false=goto_false,
+        conditions=[when_fns.get(node["id"]) for node in nodes],
+    )
+    
+    if len(_COMPILED_CACHE) >= _COMPILED_CACHE_SIZE:
+        # Evict the oldest entry; dicts keep insertion order
+        del _COMPILED_CACHE[next(iter(_COMPILED_CACHE))]
+    _COMPILED_CACHE[canonical_json] = compiled
+    return compiled
+
+
+def execute(dsl: Union[Dict[str, Any], CompiledDSL], case: Dict[str, Any]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Execute DSL rules on a case and return actions and trace.
+    
+    Args:
+        dsl: DSL dictionary with meta and nodes, or a CompiledDSL from
+            compile_dsl() to skip serialization as well on repeated runs
+        case: Case data dictionary
+        
+    Returns:
+        Tuple of (actions_list, trace_list)
+    """
+    compiled = dsl if isinstance(dsl, CompiledDSL) else compile_dsl(dsl)
+    return _run(compiled, _interpreter_for(compiled), case)
+
+
+def execute_batch(dsl: Union[Dict[str, Any], CompiledDSL],
+                  cases: Iterable[Dict[str, Any]]) -> List[Tuple[List[Dict], List[Dict]]]:
+    """
+    Execute DSL rules on many cases.
+    
+    The DSL is compiled once for the whole batch, so a raw dictionary is
+    validated and serialized once rather than once per case. Every trace
+    entry in the batch carries the same timestamp.
+    
+    Args:
+        dsl: DSL dictionary with meta and nodes, or a CompiledDSL
+        cases: Case data dictionaries
+        
+    Returns:
+        List of (actions_list, trace_list) tuples, one per case, as
+        returned by execute()
+    """
+    compiled = dsl if isinstance(dsl, CompiledDSL) else compile_dsl(dsl)
+    interpreter = _interpreter_for(compiled)
+    return [_run(compiled, interpreter, case) for case in cases]
+
+
+def _interpreter_for(compiled: CompiledDSL) -> DSLInterpreter:
+    """Create an interpreter stamped with a compiled DSL's metadata."""
+    interpreter = DSLInterpreter()
+    interpreter.profile = compiled.profile
+    interpreter.version = compiled.version
+    interpreter.rule_hash = compiled.rule_hash
+    interpreter.when_fns = compiled.when_fns
+    return interpreter
+
+
+def _run(compiled: CompiledDSL, interpreter: DSLInterpreter,
+         case: Dict[str, Any]) -> Tuple[List[Dict], List[Dict]]:
+    """Walk a compiled DSL for one case; see execute()."""
+    nodes = compiled.nodes
+    goto_true = compiled.goto_true
+    goto_false = compiled.goto_false
+    conditions = compiled.conditions
+    current_index = compiled.entry_index
     
     # Execute nodes
     all_actions = []
     trace = []
-    visited_nodes = set()
+    # Visited flags by node position; links were resolved to positions by
+    # compile_dsl(), so neither stepping nor cycle checks hash anything
+    visited = bytearray(len(nodes))
     max_iterations = 100  # Safety limit to prevent infinite loops
     
-    for iteration in range(max_iterations):
-        if current_node is None:
-            break
-        
-        current_node_id = current_node["id"]
+    hops = 0
+    while hops < max_iterations:
+        hops += 1
         
         # Check for cycles
-        if current_node_id in visited_nodes:
+        if visited[current_index]:
             # Add safety stop trace entry
-            safety_entry = TraceEntry(
-                node_id="safety_stop",
-                node_type="safety_stop",
-                outcome="cycle_detected",
-                profile=interpreter.profile,
-                version=interpreter.version,
-                rule_hash=interpreter.rule_hash,
-                timestamp=datetime.now().isoformat()
-            )
-            trace.append(safety_entry.to_dict())
+            trace.append(_mk_safety_stop(interpreter, "cycle_detected"))
             break
         
-        visited_nodes.add(current_node_id)
+        visited[current_index] = 1
+        node = nodes[current_index]
         
+        # Same steps as execute_node(), with the next node found by position
         try:
-            actions, next_node_id, trace_entry = interpreter.execute_node(current_node, case)
-            
-            # Add actions to total
-            all_actions.extend(actions)
-            
-            # Add trace entry
-            if trace_entry:
-                trace.append(trace_entry.to_dict())
-            
-            # Move to next node
-            if next_node_id:
-                current_node = interpreter.get_node_by_id(nodes, next_node_id)
-                if not current_node:
-                    # Add safety stop for missing node
-                    safety_entry = TraceEntry(
-                        node_id="safety_stop",
-                        node_type="safety_stop",
-                        outcome="missing_node",
-                        profile=interpreter.profile,
-                        version=interpreter.version,
-                        rule_hash=interpreter.rule_hash,
-                        timestamp=datetime.now().isoformat()
-                    )
-                    trace.append(safety_entry.to_dict())
-                    break
+            if node["type"] == "decision":
+                outcome = interpreter.evaluate_condition(node["when"], case,
+                                                         conditions[current_index])
+                trace.append(_mk_trace(node["id"], "decision", interpreter,
+                                       outcome="true" if outcome else "false",
+                                       cite=node.get("cite")))
+                current_index = goto_true[current_index] if outcome else goto_false[current_index]
             else:
-                # No next node, execution complete
-                break
-                
+                actions = node.get("actions", [])
+                all_actions.extend(actions)
+                trace.append(_mk_trace(node["id"], "action", interpreter,
+                                       actions=actions, cite=node.get("cite")))
+                current_index = goto_true[current_index]
         except InterpreterError as e:
             # Add safety stop for interpreter error
-            safety_entry = TraceEntry(
-                node_id="safety_stop",
-                node_type="safety_stop",
-                outcome="interpreter_error",
-                profile=interpreter.profile,
-                version=interpreter.version,
-                rule_hash=interpreter.rule_hash,
-                timestamp=datetime.now().isoformat()
-            )
-            safety_entry.outcome = f"interpreter_error: {str(e)}"
-            trace.append(safety_entry.to_dict())
+            trace.append(_mk_safety_stop(interpreter, "interpreter_error", e))
             break
         except Exception as e:
             # Add safety stop for unexpected error
-            safety_entry = TraceEntry(
-                node_id="safety_stop",
-                node_type="safety_stop",
-                outcome="unexpected_error",
-                profile=interpreter.profile,
-                version=interpreter.version,
-                rule_hash=interpreter.rule_hash,
-                timestamp=datetime.now().isoformat()
-            )
-            safety_entry.outcome = f"unexpected_error: {str(e)}"
-            trace.append(safety_entry.to_dict())
+            trace.append(_mk_safety_stop(interpreter, "unexpected_error", e))
             break
-    
-    if iteration >= max_iterations - 1:
-        # Add safety stop for max iterations
-        safety_entry = TraceEntry(
-            node_id="safety_stop",
-            node_type="safety_stop",
-            outcome="max_iterations_exceeded",
-            profile=interpreter.profile,
-            version=interpreter.version,
-            rule_hash=interpreter.rule_hash,
-            timestamp=datetime.now().isoformat()
-        )
-        trace.append(safety_entry.to_dict())
+        
+        if current_index < 0:
+            if current_index == _MISSING:
+                # Add safety stop for missing node
+                trace.append(_mk_safety_stop(interpreter, "missing_node"))
+            # Otherwise there is no next node and execution is complete
+            break
+    else:
+        # The hop budget ran out before execution finished
+        trace.append(_mk_safety_stop(interpreter, "max_iterations_exceeded"))
     
     return all_actions, trace
 
 
 def load_dsl_from_yaml(yaml_content: str) -> Dict[str, Any]:
     """Load DSL from YAML string."""
+    # Imported here so that executing already-loaded rules never pays for
+    # importing PyYAML
+    import yaml
+    try:
+        # Prefer the libyaml-backed loader; both build the same safe types
+        loader = yaml.CSafeLoader
+    except AttributeError:
+        loader = yaml.SafeLoader
+    
     try:
-        return yaml.safe_load(yaml_content)
+        return yaml.load(yaml_content, Loader=loader)
     except yaml.YAMLError as e:
         raise InterpreterError(f"Invalid YAML: {e}")
 
@@ -2,24 +2,162 @@
 Snippet retrieval system for citations and explanations.
 """
 
+import heapq
 import json
 import os
+import pickle
 import re
-from collections import Counter
-from typing import Dict, List, Optional, Any
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Any
 import math
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; searches then score from the postings dicts
+    np = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json parses the same documents
+    _json_loads = json.loads
+
+# Word tokens; equivalent to \b\w+\b since a greedy \w+ run always ends at
+# a word boundary
+_WORD_RE = re.compile(r'\w+')
+
+# On-disk index cache, stored inside the snippets directory
+_CACHE_FILENAME = ".cache.pkl"
+_CACHE_VERSION = 1
+
+# Index fields stored in the cache and the type each must have
+_CACHE_FIELDS = {
+    'snippets': dict,
+    'doc_terms': dict,
+    'doc_lengths': dict,
+    'postings': dict,
+    'doc_order': dict,
+    'next_order': int,
+}
+
+
+class _ScoringArrays(NamedTuple):
+    """Term-major sparse layout of the index, rebuilt lazily after changes."""
+    term_ids: Dict[str, int]     # term -> column number
+    doc_ids: List[str]           # row number -> document ID, in index order
+    doc_rows: Dict[str, int]     # document ID -> row number
+    indptr: Any                  # column t spans indices/data[indptr[t]:indptr[t + 1]]
+    indices: Any                 # row numbers of the documents containing each term
+    data: Any                    # normalized term frequencies (float32)
+
 
 class SnippetRetriever:
     """Retrieves and ranks snippets based on relevance."""
     
-    def __init__(self, snippets_dir: str = "snippets"):
+    def __init__(self, snippets_dir: str = "snippets", use_cache: bool = False):
+        """
+        Load snippets and build the index.
+        
+        Args:
+            snippets_dir: Directory containing snippet JSONL files
+            use_cache: Reuse a pickled index from the snippets directory when
+                no JSONL file has changed since it was written, and write one
+                otherwise. Only enable for directories you trust, since
+                loading a pickle can run arbitrary code.
+        """
         self.snippets_dir = snippets_dir
         self.snippets = {}
-        self.tf_idf_index = {}
-        self.idf_scores = {}
+        # Term counts and token count of each indexed document
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        # Inverted index: term -> {doc_id: normalized term frequency}. The
+        # size of each postings dict is the term's document frequency, so
+        # IDF is computed at query time and never needs a rebuild.
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # Position of each document in the index, used to break score ties
+        self._doc_order: Dict[str, int] = {}
+        self._next_order = 0
+        # NumPy view of the postings, built on first search after a change
+        self._arrays: Optional[_ScoringArrays] = None
+        
+        if use_cache and self._load_index_cache():
+            return
         self._load_snippets()
         self._build_tf_idf_index()
+        if use_cache:
+            self._save_index_cache()
+    
+    def _files_signature(self) -> tuple:
+        """Name, mtime and size of every snippet file, in load order."""
+        if not os.path.exists(self.snippets_dir):
+            return ()
+        
+        signature = []
+        for filename in os.listdir(self.snippets_dir):
+            if filename.endswith('.jsonl'):
+                stat = os.stat(os.path.join(self.snippets_dir, filename))
+                signature.append((filename, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
+    def _load_index_cache(self) -> bool:
+        """Restore snippets and index from the cache if it is still current."""
+        cache_path = os.path.join(self.snippets_dir, _CACHE_FILENAME)
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            # A corrupt or foreign pickle can fail in almost any way; every
+            # failure is a cache miss and the index is rebuilt
+            return False
+        
+        if (not isinstance(cached, dict) or cached.get('version') != _CACHE_VERSION
+                or cached.get('signature') != self._files_signature()):
+            return False
+        for field, field_type in _CACHE_FIELDS.items():
+            if type(cached.get(field)) is not field_type:
+                return False
+        indexed = cached['snippets'].keys()
+        if not (cached['doc_terms'].keys() == cached['doc_lengths'].keys()
+                == cached['doc_order'].keys() == indexed):
+            return False
+        
+        self.snippets = cached['snippets']
+        self._doc_terms = cached['doc_terms']
+        self._doc_lengths = cached['doc_lengths']
+        self._postings = cached['postings']
+        self._doc_order = cached['doc_order']
+        self._next_order = cached['next_order']
+        return True
+    
+    def _save_index_cache(self):
+        """Write snippets and index to the cache; failures are not fatal."""
+        if not os.path.isdir(self.snippets_dir):
+            return
+        
+        cached = {
+            'version': _CACHE_VERSION,
+            'signature': self._files_signature(),
+            'snippets': self.snippets,
+            'doc_terms': self._doc_terms,
+            'doc_lengths': self._doc_lengths,
+            'postings': self._postings,
+            'doc_order': self._doc_order,
+            'next_order': self._next_order,
+        }
+        cache_path = os.path.join(self.snippets_dir, _CACHE_FILENAME)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Replace atomically so concurrent readers never see a partial file
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write snippet index cache {cache_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
     
     def _load_snippets(self):
         """Load all snippets from JSONL files in the snippets directory."""
@@ -34,14 +172,14 @@ class SnippetRetriever:
     def _load_snippets_from_file(self, filepath: str):
         """Load snippets from a single JSONL file."""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+            # Lines are parsed straight from bytes; both parsers decode UTF-8
+            with open(filepath, 'rb') as f:
                 for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
+                    if not line.strip():
                         continue
                     
                     try:
-                        snippet = json.loads(line)
+                        snippet = _json_loads(line)
                         snippet_id = snippet.get('id')
                         if snippet_id:
                             self.snippets[snippet_id] = snippet
@@ -58,56 +196,113 @@ class SnippetRetriever:
             return []
         
         # Convert to lowercase and split on non-alphanumeric characters
-        tokens = re.findall(r'\b\w+\b', text.lower())
-        return tokens
+        return _WORD_RE.findall(text.lower())
     
     def _build_tf_idf_index(self):
         """Build TF-IDF index for snippet retrieval."""
-        # Collect all documents (snippets)
-        documents = []
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._postings = {}
+        self._doc_order = {}
+        self._next_order = 0
+        self._arrays = None
+        
         for snippet_id, snippet in self.snippets.items():
-            # Combine line and short_quote for indexing
-            text = ""
-            if 'line' in snippet:
-                text += snippet['line'] + " "
-            if 'short_quote' in snippet:
-                text += snippet['short_quote'] + " "
-            
-            documents.append({
-                'id': snippet_id,
-                'text': text.strip()
-            })
+            self._index_snippet(snippet_id, snippet)
+    
+    def _index_snippet(self, snippet_id: str, snippet: Dict[str, Any]):
+        """Add one snippet's terms to the index."""
+        # Combine line and short_quote for indexing
+        text = ""
+        if 'line' in snippet:
+            text += snippet['line'] + " "
+        if 'short_quote' in snippet:
+            text += snippet['short_quote'] + " "
         
-        if not documents:
-            return
+        self._arrays = None
+        term_counts = Counter(self._tokenize(text.strip()))
+        doc_length = sum(term_counts.values())
+        self._doc_terms[snippet_id] = term_counts
+        self._doc_lengths[snippet_id] = doc_length
+        if snippet_id not in self._doc_order:
+            self._doc_order[snippet_id] = self._next_order
+            self._next_order += 1
         
-        # Calculate TF (Term Frequency) for each document
-        doc_terms = {}
-        all_terms = set()
-        
-        for doc in documents:
-            tokens = self._tokenize(doc['text'])
-            term_counts = Counter(tokens)
-            doc_terms[doc['id']] = term_counts
-            all_terms.update(tokens)
-        
-        # Calculate IDF (Inverse Document Frequency)
-        total_docs = len(documents)
-        for term in all_terms:
-            docs_with_term = sum(1 for term_counts in doc_terms.values() if term in term_counts)
-            self.idf_scores[term] = math.log(total_docs / docs_with_term) if docs_with_term > 0 else 0
-        
-        # Calculate TF-IDF scores
-        for doc_id, term_counts in doc_terms.items():
-            tf_idf_scores = {}
-            doc_length = sum(term_counts.values())
+        postings = self._postings
+        for term, count in term_counts.items():
+            tf = count / doc_length  # Normalized term frequency
+            term_postings = postings.get(term)
+            if term_postings is None:
+                postings[term] = {snippet_id: tf}
+            else:
+                term_postings[snippet_id] = tf
+    
+    def _unindex_snippet(self, snippet_id: str):
+        """Remove one snippet's terms from the index."""
+        term_counts = self._doc_terms.pop(snippet_id, None)
+        if term_counts is None:
+            return
+        self._arrays = None
+        del self._doc_lengths[snippet_id]
+        for term in term_counts:
+            term_postings = self._postings[term]
+            del term_postings[snippet_id]
+            if not term_postings:
+                del self._postings[term]
+    
+    def _idf(self, term: str) -> float:
+        """Inverse document frequency of a term in the current index."""
+        term_postings = self._postings.get(term)
+        if not term_postings:
+            return 0
+        return math.log(len(self._doc_terms) / len(term_postings))
+    
+    def _scoring_arrays(self) -> _ScoringArrays:
+        """Return the NumPy layout of the postings, building it if stale."""
+        if self._arrays is None:
+            doc_order = self._doc_order
+            doc_ids = sorted(self._doc_terms, key=doc_order.__getitem__)
+            doc_rows = {doc_id: row for row, doc_id in enumerate(doc_ids)}
             
-            for term, count in term_counts.items():
-                tf = count / doc_length  # Normalized term frequency
-                idf = self.idf_scores[term]
-                tf_idf_scores[term] = tf * idf
+            term_ids = {}
+            indptr = [0]
+            indices = []
+            data = []
+            for term, term_postings in self._postings.items():
+                term_ids[term] = len(term_ids)
+                indices.extend(doc_rows[doc_id] for doc_id in term_postings)
+                data.extend(term_postings.values())
+                indptr.append(len(indices))
             
-            self.tf_idf_index[doc_id] = tf_idf_scores
+            self._arrays = _ScoringArrays(
+                term_ids=term_ids,
+                doc_ids=doc_ids,
+                doc_rows=doc_rows,
+                indptr=np.asarray(indptr, dtype=np.int64),
+                indices=np.asarray(indices, dtype=np.int64),
+                # Only the ranking matters, so single precision is plenty
+                # and halves the memory traffic of every scatter-add
+                data=np.asarray(data, dtype=np.float32),
+            )
+        return self._arrays
+    
+    @property
+    def idf_scores(self) -> Dict[str, float]:
+        """IDF of every indexed term, computed from the current index."""
+        # Document frequencies are the postings sizes, so one pass suffices
+        total_docs = len(self._doc_terms)
+        return {term: math.log(total_docs / len(term_postings))
+                for term, term_postings in self._postings.items()}
+    
+    @property
+    def tf_idf_index(self) -> Dict[str, Dict[str, float]]:
+        """TF-IDF scores of every indexed document, computed from the current index."""
+        idf_scores = self.idf_scores
+        return {
+            doc_id: {term: count / self._doc_lengths[doc_id] * idf_scores[term]
+                     for term, count in term_counts.items()}
+            for doc_id, term_counts in self._doc_terms.items()
+        }
     
     def retrieve(self, snippet_ids: List[str], k: int = 3) -> List[Dict[str, Any]]:
         """
@@ -153,7 +348,7 @@ class SnippetRetriever:
     
     def _search_by_relevance(self, query_keywords: List[str], k: int, exclude_ids: set) -> List[Dict[str, Any]]:
         """Search snippets by relevance to query keywords."""
-        if not query_keywords or not self.tf_idf_index:
+        if not query_keywords or not self._doc_terms:
             return []
         
         # Tokenize query
@@ -164,32 +359,76 @@ class SnippetRetriever:
         if not query_tokens:
             return []
         
-        # Calculate relevance scores
-        relevance_scores = []
-        
-        for doc_id, tf_idf_scores in self.tf_idf_index.items():
-            if doc_id in exclude_ids:
-                continue
-            
-            score = 0
-            for token in query_tokens:
-                if token in tf_idf_scores:
-                    score += tf_idf_scores[token]
-            
-            if score > 0:
-                relevance_scores.append((doc_id, score))
-        
-        # Sort by relevance score (descending)
-        relevance_scores.sort(key=lambda x: x[1], reverse=True)
+        if np is not None:
+            top_ids = self._top_k_numpy(query_tokens, k, exclude_ids)
+        else:
+            top_ids = self._top_k_python(query_tokens, k, exclude_ids)
         
         # Return top k results
         results = []
-        for doc_id, score in relevance_scores[:k]:
+        for doc_id in top_ids:
             if doc_id in self.snippets:
                 results.append(self.snippets[doc_id])
         
         return results
     
+    def _top_k_python(self, query_tokens: List[str], k: int, exclude_ids: set) -> List[str]:
+        """Rank documents by walking the postings dicts."""
+        # Accumulate scores only for documents that contain a query token.
+        # Tokens are visited in query order, so each document's sum is
+        # added up in the same order as a full scan would.
+        scores = defaultdict(float)
+        for token in query_tokens:
+            term_postings = self._postings.get(token)
+            if not term_postings:
+                continue
+            idf = self._idf(token)
+            for doc_id, tf in term_postings.items():
+                scores[doc_id] += tf * idf
+        
+        relevance_scores = [(doc_id, score) for doc_id, score in scores.items()
+                            if score > 0 and doc_id not in exclude_ids]
+        
+        # Select the top k by relevance score (descending), ties in index order
+        doc_order = self._doc_order
+        top = heapq.nlargest(k, relevance_scores, key=lambda x: (x[1], -doc_order[x[0]]))
+        return [doc_id for doc_id, _ in top]
+    
+    def _top_k_numpy(self, query_tokens: List[str], k: int, exclude_ids: set) -> List[str]:
+        """Rank documents with one vectorized update per query token."""
+        if k <= 0:
+            return []
+        arrays = self._scoring_arrays()
+        n_docs = len(arrays.doc_ids)
+        
+        # Same per-document summation order as _top_k_python. Scores are
+        # single precision, so documents whose scores differ only past
+        # float32 resolution may rank as ties (broken by index order).
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for token in query_tokens:
+            term_id = arrays.term_ids.get(token)
+            if term_id is None:
+                continue
+            start, end = arrays.indptr[term_id], arrays.indptr[term_id + 1]
+            idf = math.log(n_docs / (end - start))
+            scores[arrays.indices[start:end]] += arrays.data[start:end] * idf
+        
+        for doc_id in exclude_ids:
+            row = arrays.doc_rows.get(doc_id)
+            if row is not None:
+                scores[row] = 0.0
+        
+        rows = np.flatnonzero(scores > 0)
+        if len(rows) > k:
+            # Keep everything tied with the k-th best score so the final
+            # sort can break ties by index order
+            row_scores = scores[rows]
+            kth_best = np.partition(row_scores, len(rows) - k)[len(rows) - k]
+            rows = rows[row_scores >= kth_best]
+        # Sort by score descending, then row (index order) ascending
+        rows = rows[np.lexsort((rows, -scores[rows]))][:k]
+        return [arrays.doc_ids[row] for row in rows.tolist()]
+    
     def get_snippet(self, snippet_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific snippet by ID."""
         return self.snippets.get(snippet_id)
@@ -201,8 +440,6 @@ class SnippetRetriever:
     def reload_snippets(self):
         """Reload snippets from files."""
         self.snippets.clear()
-        self.tf_idf_index.clear()
-        self.idf_scores.clear()
         self._load_snippets()
         self._build_tf_idf_index()
     
@@ -211,15 +448,16 @@ class SnippetRetriever:
         snippet_id = snippet.get('id')
         if snippet_id:
             self.snippets[snippet_id] = snippet
-            # Rebuild index to include new snippet
-            self._build_tf_idf_index()
+            # Only this snippet's terms change; IDF follows at query time
+            self._unindex_snippet(snippet_id)
+            self._index_snippet(snippet_id, snippet)
     
     def remove_snippet(self, snippet_id: str):
         """Remove a snippet from the index."""
         if snippet_id in self.snippets:
             del self.snippets[snippet_id]
-            # Rebuild index
-            self._build_tf_idf_index()
+            self._unindex_snippet(snippet_id)
+            self._doc_order.pop(snippet_id, None)
 
 
 # Convenience functions
@@ -228,15 +466,37 @@ def create_retriever(snippets_dir: str = "snippets") -> SnippetRetriever:
     return SnippetRetriever(snippets_dir)
 
 
+def _default_retriever(snippets_dir: str = "snippets") -> SnippetRetriever:
+    """
+    Shared retriever for the convenience functions, one per directory.
+    
+    The same instance also backs every ExplanationGenerator created without
+    a retriever, so add_snippet()/remove_snippet() on it are seen by all of
+    them. _default_retriever.cache_clear() drops the shared instances.
+    """
+    # Resolved before the cache lookup so that a relative path read after a
+    # chdir() gets that directory's index rather than a stale one
+    return _shared_retriever(os.path.abspath(snippets_dir))
+
+
+@lru_cache(maxsize=None)
+def _shared_retriever(snippets_dir: str) -> SnippetRetriever:
+    """Build the retriever for an absolute directory."""
+    return SnippetRetriever(snippets_dir)
+
+
+_default_retriever.cache_clear = _shared_retriever.cache_clear
+
+
 def retrieve_snippets(snippet_ids: List[str], retriever: SnippetRetriever = None, k: int = 3) -> List[Dict[str, Any]]:
     """Retrieve snippets by ID."""
     if retriever is None:
-        retriever = create_retriever()
+        retriever = _default_retriever()
     return retriever.retrieve(snippet_ids, k)
 
 
 def search_snippets(query: str, retriever: SnippetRetriever = None, k: int = 3) -> List[Dict[str, Any]]:
     """Search snippets by query."""
     if retriever is None:
-        retriever = create_retriever()
+        retriever = _default_retriever()
     return retriever.search(query, k)
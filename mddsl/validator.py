@@ -4,9 +4,58 @@ Validators for case data and DSL rules.
 
 import json
 import os
-from typing import Any, Dict, List, Set, Tuple
+import sys
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Set, Tuple
 import jsonschema
 from jsonschema import Draft7Validator
+from jsonschema.validators import validator_for
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; Draft7Validator checks every document
+    fastjsonschema = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json parses the same documents
+    _json_loads = json.loads
+
+
+# Node fields that reference other nodes, in the order they are followed
+_LINK_FIELDS = ("next", "goto_true", "goto_false")
+
+# Sentinel for node fields that are not set at all
+_ABSENT = object()
+
+# Valid action types (can be expanded)
+_VALID_ACTION_TYPES = frozenset({
+    "suggest_referral", "order_test", "set_followup", "abstain"
+})
+
+# Per node type: label, required fields and forbidden fields
+_NODE_FIELD_RULES = {
+    "decision": ("Decision", frozenset({"when"}), frozenset({"actions"})),
+    "action": ("Action", frozenset({"actions"}), frozenset({"when"}))
+}
+_FIELD_NOUNS = {"when": "condition", "actions": "field"}
+
+# Below this many nodes, building CSR arrays and calling the cycle kernel
+# costs more than the pure-Python walk
+_KERNEL_MIN_NODES = 512
+
+
+class _GraphIndex(NamedTuple):
+    """Node IDs, references and adjacency of a DSL's node graph."""
+    valid_ids: FrozenSet[Any]
+    graph: Dict[str, List[str]]
+    links: List[Tuple[Any, str, Any]]
+
+
+def _intern(value: Any) -> Any:
+    """Intern string node IDs so repeated IDs share one object."""
+    return sys.intern(value) if type(value) is str else value
 
 
 class ValidationError(Exception):
@@ -14,6 +63,75 @@ class ValidationError(Exception):
     pass
 
 
+def _compile_fast(schema: Dict[str, Any]):
+    """
+    Compile a schema into a fastjsonschema validation function.
+    
+    Args:
+        schema: JSON schema dictionary
+        
+    Returns:
+        Validation function, or None if fastjsonschema is unavailable or
+        does not support the schema
+    """
+    if fastjsonschema is None:
+        return None
+    
+    try:
+        # Defaults and formats are off so the fast path never mutates the
+        # document and accepts exactly what Draft7Validator accepts
+        return fastjsonschema.compile(schema, use_default=False, use_formats=False)
+    except fastjsonschema.JsonSchemaDefinitionException:
+        return None
+
+
+def _fast_accepts(fast, instance: Any) -> bool:
+    """Return True if a compiled fast validator accepts the instance."""
+    if fast is None:
+        return False
+    
+    try:
+        fast(instance)
+    except fastjsonschema.JsonSchemaException:
+        return False
+    return True
+
+
+@lru_cache(maxsize=8)
+def _load_and_compile(abspath: str, mtime_ns: int) -> Tuple[Dict[str, Any], Any, Any]:
+    """
+    Load and compile a schema file, cached per file version.
+    
+    The schema is checked against its metaschema once here rather than on
+    every validator construction. The modification time is part of the key
+    so an edited schema is reloaded; callers must not mutate the returned
+    schema.
+    """
+    try:
+        with open(abspath, 'rb') as f:
+            schema = _json_loads(f.read())
+    except json.JSONDecodeError as e:  # orjson's error subclasses this too
+        raise ValidationError(f"Invalid JSON in schema file: {e}")
+    
+    validator_cls = validator_for(schema, default=Draft7Validator)
+    try:
+        validator_cls.check_schema(schema)
+    except jsonschema.SchemaError as e:
+        raise ValidationError(f"Invalid schema in {abspath}: {e.message}")
+    
+    return schema, validator_cls(schema), _compile_fast(schema)
+
+
+def _load_schema_cached(schema_path: str) -> Tuple[Dict[str, Any], Any, Any]:
+    """Load a schema through the shared cache."""
+    abspath = os.path.abspath(schema_path)
+    try:
+        mtime_ns = os.stat(abspath).st_mtime_ns
+        return _load_and_compile(abspath, mtime_ns)
+    except FileNotFoundError:
+        raise ValidationError(f"Schema file not found: {schema_path}")
+
+
 class CaseValidator:
     """Validates case data against schema."""
     
@@ -24,18 +142,11 @@ class CaseValidator:
             schema_path = os.path.join(current_dir, "case_schema.json")
         
         self.schema_path = schema_path
-        self.schema = self._load_schema()
-        self.validator = Draft7Validator(self.schema)
+        self.schema, self.validator, self._fast = self._load_schema()
     
-    def _load_schema(self) -> Dict[str, Any]:
-        """Load JSON schema from file."""
-        try:
-            with open(self.schema_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            raise ValidationError(f"Schema file not found: {self.schema_path}")
-        except json.JSONDecodeError as e:
-            raise ValidationError(f"Invalid JSON in schema file: {e}")
+    def _load_schema(self) -> Tuple[Dict[str, Any], Any, Any]:
+        """Load JSON schema from file, with its compiled validators."""
+        return _load_schema_cached(self.schema_path)
     
     def validate_case(self, case: Dict[str, Any]) -> List[str]:
         """
@@ -49,16 +160,38 @@ class CaseValidator:
         """
         errors = []
         
+        # Valid cases pass the compiled check; only failures pay for
+        # Draft7Validator, which reports every error rather than the first
+        if _fast_accepts(self._fast, case):
+            return errors
+        
         try:
             # Validate against schema
-            validation_errors = list(self.validator.iter_errors(case))
-            for error in validation_errors:
-                path = '.'.join(str(p) for p in error.path) if error.path else 'root'
-                errors.append(f"{path}: {error.message}")
+            errors.extend(
+                f"{'.'.join(map(str, e.absolute_path)) if e.path else 'root'}: {e.message}"
+                for e in self.validator.iter_errors(case)
+            )
         except Exception as e:
             errors.append(f"Schema validation failed: {e}")
         
         return errors
+    
+    def is_valid(self, case: Dict[str, Any]) -> bool:
+        """
+        Check whether a case conforms to the schema.
+        
+        Stops at the first schema error instead of collecting them all. A
+        case the compiled check rejects is rechecked with the Draft7
+        validator, so the result always agrees with validate_case().
+        
+        Args:
+            case: Case data dictionary
+            
+        Returns:
+            True if the case is valid
+        """
+        return (_fast_accepts(self._fast, case)
+                or next(self.validator.iter_errors(case), None) is None)
 
 
 class DSLValidator:
@@ -71,18 +204,11 @@ class DSLValidator:
             schema_path = os.path.join(current_dir, "rules_schema.json")
         
         self.schema_path = schema_path
-        self.schema = self._load_schema()
-        self.validator = Draft7Validator(self.schema)
+        self.schema, self.validator, self._fast = self._load_schema()
     
-    def _load_schema(self) -> Dict[str, Any]:
-        """Load JSON schema from file."""
-        try:
-            with open(self.schema_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            raise ValidationError(f"Schema file not found: {self.schema_path}")
-        except json.JSONDecodeError as e:
-            raise ValidationError(f"Invalid JSON in schema file: {e}")
+    def _load_schema(self) -> Tuple[Dict[str, Any], Any, Any]:
+        """Load JSON schema from file, with its compiled validators."""
+        return _load_schema_cached(self.schema_path)
     
     def lint_rules(self, dsl: Dict[str, Any]) -> List[str]:
         """
@@ -98,45 +224,78 @@ class DSLValidator:
         
         try:
             # Validate against schema first
-            schema_errors = list(self.validator.iter_errors(dsl))
-            for error in schema_errors:
-                path = '.'.join(str(p) for p in error.path) if error.path else 'root'
-                warnings.append(f"SCHEMA_ERROR: {path}: {error.message}")
+            schema_errors = () if _fast_accepts(self._fast, dsl) else self.validator.iter_errors(dsl)
+            warnings.extend(
+                f"SCHEMA_ERROR: {'.'.join(map(str, e.absolute_path)) if e.path else 'root'}: {e.message}"
+                for e in schema_errors
+            )
         except Exception as e:
             warnings.append(f"SCHEMA_ERROR: Schema validation failed: {e}")
         
-        # Additional linting checks
+        # Additional linting checks; the graph checks share one index
+        index = self._build_index(dsl)
         warnings.extend(self._check_duplicate_ids(dsl))
-        warnings.extend(self._check_missing_nodes(dsl))
-        warnings.extend(self._check_unreachable_nodes(dsl))
-        warnings.extend(self._check_cycles(dsl))
+        warnings.extend(self._check_missing_nodes(dsl, index))
+        warnings.extend(self._check_unreachable_nodes(dsl, index))
+        warnings.extend(self._check_cycles(dsl, index))
         warnings.extend(self._check_action_consistency(dsl))
         warnings.extend(self._check_node_structure(dsl))
         
-        return warnings
+        # Report each distinct message once, e.g. when many actions in one
+        # node share an unknown type; dict keys keep first-seen order
+        return list(dict.fromkeys(warnings))
     
     def _check_duplicate_ids(self, dsl: Dict[str, Any]) -> List[str]:
         """Check for duplicate node IDs."""
         warnings = []
         nodes = dsl.get("nodes", [])
-        ids = []
+        seen = set()
         
         for node in nodes:
             node_id = node.get("id")
-            if node_id in ids:
+            if node_id in seen:
                 warnings.append(f"DUPLICATE_ID: Duplicate node ID '{node_id}'")
-            ids.append(node_id)
+            else:
+                seen.add(node_id)
         
         return warnings
     
-    def _check_missing_nodes(self, dsl: Dict[str, Any]) -> List[str]:
+    def _build_index(self, dsl: Dict[str, Any]) -> _GraphIndex:
+        """Collect node IDs, links and the node graph in one pass over the nodes."""
+        valid_ids = set()
+        graph = {}
+        links = []
+        
+        for node in dsl.get("nodes", []):
+            node_id = node.get("id", _ABSENT)
+            has_id = node_id is not _ABSENT
+            if has_id:
+                node_id = _intern(node_id)
+                valid_ids.add(node_id)
+            else:
+                node_id = "unknown"
+            
+            # One lookup per link field; an explicit null still counts as a link
+            neighbors = []
+            for field in _LINK_FIELDS:
+                target = node.get(field, _ABSENT)
+                if target is not _ABSENT:
+                    target = _intern(target)
+                    neighbors.append(target)
+                    links.append((node_id, field, target))
+            
+            if has_id and node_id:
+                graph[node_id] = neighbors
+        
+        return _GraphIndex(frozenset(valid_ids), graph, links)
+    
+    def _check_missing_nodes(self, dsl: Dict[str, Any], index: _GraphIndex = None) -> List[str]:
         """Check for references to missing nodes."""
         warnings = []
-        nodes = dsl.get("nodes", [])
         meta = dsl.get("meta", {})
-        
-        # Build set of valid node IDs
-        valid_ids = {node.get("id") for node in nodes if "id" in node}
+        if index is None:
+            index = self._build_index(dsl)
+        valid_ids = index.valid_ids
         
         # Check entry node
         entry_node = meta.get("entry")
@@ -144,29 +303,13 @@ class DSLValidator:
             warnings.append(f"MISSING_NODE: Entry node '{entry_node}' not found")
         
         # Check all node references
-        for node in nodes:
-            node_id = node.get("id", "unknown")
-            
-            # Check next references
-            if "next" in node:
-                next_id = node["next"]
-                if next_id not in valid_ids:
-                    warnings.append(f"MISSING_NODE: Node '{node_id}' references missing next node '{next_id}'")
-            
-            # Check goto references
-            if "goto_true" in node:
-                goto_id = node["goto_true"]
-                if goto_id not in valid_ids:
-                    warnings.append(f"MISSING_NODE: Node '{node_id}' references missing goto_true node '{goto_id}'")
-            
-            if "goto_false" in node:
-                goto_id = node["goto_false"]
-                if goto_id not in valid_ids:
-                    warnings.append(f"MISSING_NODE: Node '{node_id}' references missing goto_false node '{goto_id}'")
+        for node_id, field, target in index.links:
+            if target not in valid_ids:
+                warnings.append(f"MISSING_NODE: Node '{node_id}' references missing {field} node '{target}'")
         
         return warnings
     
-    def _check_unreachable_nodes(self, dsl: Dict[str, Any]) -> List[str]:
+    def _check_unreachable_nodes(self, dsl: Dict[str, Any], index: _GraphIndex = None) -> List[str]:
         """Check for unreachable nodes."""
         warnings = []
         nodes = dsl.get("nodes", [])
@@ -175,52 +318,54 @@ class DSLValidator:
         if not nodes:
             return warnings
         
-        # Build graph of node references
-        graph = {}
-        for node in nodes:
-            node_id = node.get("id")
-            if node_id:
-                graph[node_id] = []
-                
-                if "next" in node:
-                    graph[node_id].append(node["next"])
-                if "goto_true" in node:
-                    graph[node_id].append(node["goto_true"])
-                if "goto_false" in node:
-                    graph[node_id].append(node["goto_false"])
-        
-        # Find reachable nodes starting from entry
+        if index is None:
+            index = self._build_index(dsl)
+        graph = index.graph
+        
+        # Walk from the entry, crossing nodes off until none are left
         reachable = set()
+        unreachable = set(index.valid_ids)
         entry_node = meta.get("entry")
         
         if entry_node and entry_node in graph:
-            self._dfs_reachable(graph, entry_node, reachable)
+            self._dfs_reachable(graph, entry_node, reachable, unreachable)
         elif nodes:
             # If no entry specified, start from first node
             first_node = nodes[0].get("id")
             if first_node:
-                self._dfs_reachable(graph, first_node, reachable)
+                self._dfs_reachable(graph, first_node, reachable, unreachable)
         
         # Check for unreachable nodes
-        all_node_ids = set(node.get("id") for node in nodes if "id" in node)
-        unreachable = all_node_ids - reachable
-        
         for node_id in unreachable:
             warnings.append(f"UNREACHABLE_NODE: Node '{node_id}' is unreachable from entry point")
         
         return warnings
     
-    def _dfs_reachable(self, graph: Dict[str, List[str]], start: str, reachable: Set[str]):
-        """DFS to find reachable nodes."""
-        if start in reachable:
-            return
-        
-        reachable.add(start)
-        if start in graph:
-            for neighbor in graph[start]:
-                self._dfs_reachable(graph, neighbor, reachable)
+    def _dfs_reachable(self, graph: Dict[str, List[str]], start: str, reachable: Set[str],
+                       pending: Set[str] = None):
+        """
+        DFS to find reachable nodes.
+        
+        Args:
+            graph: Mapping from node ID to the IDs it references
+            start: Node ID to start from
+            reachable: Set that collects the reached node IDs
+            pending: Optional set of node IDs still to reach; reached IDs are
+                removed and the walk stops once it is empty
+        """
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node in reachable:
+                continue
+            reachable.add(node)
+            if pending is not None:
+                pending.discard(node)
+                if not pending:
+                    return
+            stack.extend(graph.get(node, ()))
     
-    def _check_cycles(self, dsl: Dict[str, Any]) -> List[str]:
+    def _check_cycles(self, dsl: Dict[str, Any], index: _GraphIndex = None) -> List[str]:
         """Check for cycles in the node graph."""
         warnings = []
         nodes = dsl.get("nodes", [])
@@ -228,64 +373,120 @@ class DSLValidator:
         if not nodes:
             return warnings
         
-        # Build graph
-        graph = {}
-        for node in nodes:
-            node_id = node.get("id")
-            if node_id:
-                graph[node_id] = []
-                
-                if "next" in node:
-                    graph[node_id].append(node["next"])
-                if "goto_true" in node:
-                    graph[node_id].append(node["goto_true"])
-                if "goto_false" in node:
-                    graph[node_id].append(node["goto_false"])
-        
-        # Check for cycles using DFS
-        visited = set()
-        rec_stack = set()
-        
-        for node_id in graph:
-            if node_id not in visited:
-                cycle = self._dfs_cycle(graph, node_id, visited, rec_stack, [])
-                if cycle:
-                    warnings.append(f"CYCLE_DETECTED: Cycle found: {' -> '.join(cycle)}")
+        if index is None:
+            index = self._build_index(dsl)
+        graph = index.graph
+        
+        # Every strongly connected component with more than one node, or
+        # with a self-loop, contains a cycle
+        for component in self._find_cycles(graph):
+            warnings.append(f"CYCLE_DETECTED: Cycle found among nodes: {', '.join(map(str, component))}")
         
         return warnings
     
-    def _dfs_cycle(self, graph: Dict[str, List[str]], node: str, visited: Set[str], 
-                   rec_stack: Set[str], path: List[str]) -> List[str]:
-        """DFS to detect cycles."""
-        visited.add(node)
-        rec_stack.add(node)
-        path.append(node)
-        
-        if node in graph:
-            for neighbor in graph[node]:
-                if neighbor not in visited:
-                    cycle = self._dfs_cycle(graph, neighbor, visited, rec_stack, path)
-                    if cycle:
-                        return cycle
-                elif neighbor in rec_stack:
-                    # Found a cycle
-                    cycle_start = path.index(neighbor)
-                    return path[cycle_start:] + [neighbor]
-        
-        rec_stack.remove(node)
-        path.pop()
-        return []
+    def _find_cycles(self, graph: Dict[str, List[str]]) -> List[List[str]]:
+        """
+        Find the cyclic strongly connected components of the node graph.
+        
+        Uses an iterative form of Tarjan's algorithm, visiting each node and
+        edge once. References to nodes outside the graph are ignored.
+        
+        Args:
+            graph: Mapping from node ID to the IDs it references
+            
+        Returns:
+            Node IDs of each cyclic component, sorted within the component
+        """
+        if len(graph) >= _KERNEL_MIN_NODES:
+            # Imported here so that linting small graphs never pays for
+            # importing Numba
+            from . import _graph_kernels as _kernels
+            if _kernels.HAVE_NUMBA:
+                return self._find_cycles_kernel(graph)
+        
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        scc_stack = []
+        components = []
+        
+        for root in graph:
+            if root in index:
+                continue
+            
+            index[root] = lowlink[root] = len(index)
+            scc_stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph[root]))]
+            
+            while work:
+                node, neighbors = work[-1]
+                for neighbor in neighbors:
+                    if neighbor not in graph:
+                        continue
+                    if neighbor not in index:
+                        index[neighbor] = lowlink[neighbor] = len(index)
+                        scc_stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(graph[neighbor])))
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[neighbor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    
+                    if lowlink[node] == index[node]:
+                        # node is the root of a component; pop its members
+                        component = []
+                        while True:
+                            member = scc_stack.pop()
+                            on_stack.remove(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        
+                        if len(component) > 1 or node in graph[node]:
+                            components.append(sorted(component, key=str))
+        
+        return components
+    
+    def _find_cycles_kernel(self, graph: Dict[str, List[str]]) -> List[List[str]]:
+        """Find cyclic components with the compiled Tarjan kernel."""
+        # Only reached with Numba installed, and so NumPy too
+        import numpy as np
+        from . import _graph_kernels as _kernels
+        
+        ids = list(graph)
+        position = {node_id: i for i, node_id in enumerate(ids)}
+        
+        # CSR adjacency over node positions, dropping links to missing nodes
+        indptr = [0]
+        indices = []
+        for node_id in ids:
+            for target in graph[node_id]:
+                j = position.get(target)
+                if j is not None:
+                    indices.append(j)
+            indptr.append(len(indices))
+        
+        labels = _kernels.tarjan_scc(np.array(indptr, dtype=np.int32),
+                                     np.array(indices, dtype=np.int32), len(ids))
+        
+        members = [[] for _ in range(int(labels.max()) + 1)]
+        for i, label in enumerate(labels.tolist()):
+            members[label].append(ids[i])
+        
+        return [sorted(component, key=str) for component in members
+                if len(component) > 1 or component[0] in graph[component[0]]]
     
     def _check_action_consistency(self, dsl: Dict[str, Any]) -> List[str]:
         """Check for consistency in action definitions."""
         warnings = []
         nodes = dsl.get("nodes", [])
         
-        # Valid action types (can be expanded)
-        valid_action_types = {
-            "suggest_referral", "order_test", "set_followup", "abstain"
-        }
-        
         for node in nodes:
             node_id = node.get("id", "unknown")
             node_type = node.get("type")
@@ -301,7 +502,7 @@ class DSLValidator:
                         continue
                     
                     action_type = action.get("type")
-                    if action_type not in valid_action_types:
+                    if action_type not in _VALID_ACTION_TYPES:
                         warnings.append(f"UNKNOWN_ACTION_TYPE: Node '{node_id}' has unknown action type '{action_type}'")
         
         return warnings
@@ -312,31 +513,30 @@ class DSLValidator:
         nodes = dsl.get("nodes", [])
         
         for node in nodes:
+            rules = _NODE_FIELD_RULES.get(node.get("type"))
+            if rules is None:
+                continue
+            
+            label, required, forbidden = rules
             node_id = node.get("id", "unknown")
-            node_type = node.get("type")
+            keys = node.keys()
             
             # Check for mixed node types
-            has_when = "when" in node
-            has_actions = "actions" in node
-            
-            if node_type == "decision" and has_actions:
-                warnings.append(f"STRUCTURE_ERROR: Decision node '{node_id}' should not have 'actions' field")
-            
-            if node_type == "action" and has_when:
-                warnings.append(f"STRUCTURE_ERROR: Action node '{node_id}' should not have 'when' field")
+            for field in sorted(keys & forbidden):
+                warnings.append(f"STRUCTURE_ERROR: {label} node '{node_id}' should not have '{field}' field")
             
             # Check for missing required fields
-            if node_type == "decision" and not has_when:
-                warnings.append(f"MISSING_FIELD: Decision node '{node_id}' missing 'when' condition")
-            
-            if node_type == "action" and not has_actions:
-                warnings.append(f"MISSING_FIELD: Action node '{node_id}' missing 'actions' field")
+            for field in sorted(required - keys):
+                warnings.append(f"MISSING_FIELD: {label} node '{node_id}' missing '{field}' {_FIELD_NOUNS[field]}")
         
         return warnings
 
 
 def validate_case(case: Dict[str, Any], case_schema_path: str = None) -> List[str]:
     """Validate a case against the schema."""
+    # Constructing a validator is cheap: _load_schema_cached re-checks the
+    # file's modification time and reuses the compiled schema, so an edited
+    # schema is picked up on the next call
     validator = CaseValidator(case_schema_path)
     return validator.validate_case(case)
 
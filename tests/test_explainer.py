@@ -0,0 +1,121 @@
+"""
+Unit tests for explanation generation.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mddsl.explainer import ExplanationGenerator, Explanation, explain, explain_lazy
+from mddsl.retrieval import SnippetRetriever, _default_retriever
+
+
+class TestExplainer(unittest.TestCase):
+    """Test cases for the explanation generator."""
+    
+    def setUp(self):
+        """Write a small snippet corpus and build a fixed case, actions and trace."""
+        snippets_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snippets_dir)
+        with open(os.path.join(snippets_dir, "test.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "DME", "source": "AAO PPP", "line": "x",
+                                "short_quote": "Confirm DME with OCT."}) + "\n")
+            f.write(json.dumps({"id": "NPDR", "source": "ICO", "line": "y",
+                                "short_quote": "Refer moderate NPDR."}) + "\n")
+        self.retriever = SnippetRetriever(snippets_dir)
+        
+        self.case = {
+            "eye": "OD",
+            "age": 62,
+            "vision_reduced": True,
+            "dr_grade": "moderate_npdr",
+            "macula": {"edema_prob": 0.35}
+        }
+        self.actions = [
+            {"type": "suggest_referral", "specialty": "retina", "urgency": "urgent"},
+            {"type": "order_test", "test_type": "OCT"},
+            {"type": "flag", "level": 2}
+        ]
+        self.trace = [
+            {"node": "qc", "type": "decision", "outcome": "true", "cite": ["DME"]},
+            {"node": "grade", "type": "decision", "outcome": "false", "cite": ["NPDR", "DME", "missing"]},
+            {"node": "refer", "type": "action", "actions": self.actions, "cite": []},
+            {"node": "safety_stop", "type": "safety_stop", "outcome": "missing_node"}
+        ]
+    
+    def test_prose_matches_template(self):
+        """Test the full prose, rule trace and citations for a fixed trace."""
+        result = explain(self.case, self.actions, self.trace, self.retriever)
+        
+        self.assertEqual(result["prose"], (
+            "Based on the clinical data (Case: OD eye, age 62, DR grade moderate_npdr, "
+            "vision reduced), the following recommendation is made: refer to retina "
+            "(urgent); order OCT; flag: {\"type\":\"flag\",\"level\":2}.\n"
+            "\n"
+            "Rule trace:\n"
+            "  • qc: condition was TRUE\n"
+            "  • grade: condition was FALSE\n"
+            "  • refer: refer to retina (urgent), order OCT, flag: {\"type\":\"flag\",\"level\":2}\n"
+            "  • SAFETY STOP: missing_node\n"
+            "\n"
+            "Citations:\n"
+            "  AAO PPP: Confirm DME with OCT.\n"
+            "  ICO: Refer moderate NPDR."
+        ))
+        self.assertEqual(result["citations"], ["AAO PPP: Confirm DME with OCT.", "ICO: Refer moderate NPDR."])
+        self.assertIs(result["actions_json"], self.actions)
+        self.assertEqual(result["case_summary"]["edema_prob"], 0.35)
+        self.assertEqual(result["case_summary"]["qc_status"], {"fundus_pass": None, "macula_view": None})
+    
+    def test_explain_returns_plain_dict(self):
+        """Test that explain() returns a mutable, JSON-serializable dictionary."""
+        result = explain(self.case, self.actions, self.trace, self.retriever)
+        self.assertIs(type(result), dict)
+        self.assertEqual(set(result), {"rule_trace", "actions_json", "citations", "prose", "case_summary"})
+        
+        self.assertEqual(json.loads(json.dumps(result)), result)
+        result["prose"] = "edited"
+        self.assertEqual(result["prose"], "edited")
+    
+    def test_lazy_explanation_matches_dict(self):
+        """Test indexing and to_dict() on the lazily built explanation."""
+        expected = explain(self.case, self.actions, self.trace, self.retriever)
+        lazy = explain_lazy(self.case, self.actions, self.trace, self.retriever)
+        self.assertIsInstance(lazy, Explanation)
+        
+        self.assertEqual(lazy["prose"], expected["prose"])
+        self.assertEqual(lazy["rule_trace"], expected["rule_trace"])
+        self.assertEqual(len(lazy), len(expected))
+        self.assertEqual(list(lazy), list(expected))
+        with self.assertRaises(KeyError):
+            lazy["missing"]
+        with self.assertRaises(TypeError):
+            lazy["prose"] = "edited"
+        
+        materialized = lazy.to_dict()
+        self.assertEqual(materialized, expected)
+        self.assertEqual(json.loads(json.dumps(materialized)), expected)
+    
+    def test_generators_share_default_retriever(self):
+        """Test that generators without a retriever reuse the shared one."""
+        self.assertIs(ExplanationGenerator().retriever, _default_retriever())
+        self.assertIs(ExplanationGenerator(self.retriever).retriever, self.retriever)
+    
+    def test_lazy_explanation_builds_components_on_demand(self):
+        """Test that reading actions_json alone never runs the LLM rewrite."""
+        calls = []
+        generator = ExplanationGenerator(self.retriever)
+        generator.set_llm_rewrite_function(lambda text, style: calls.append(style) or text.upper())
+        
+        lazy = generator.explain_lazy(self.case, self.actions, self.trace)
+        self.assertIs(lazy["actions_json"], self.actions)
+        self.assertEqual(calls, [])
+        
+        self.assertTrue(lazy["prose"].startswith("BASED ON THE CLINICAL DATA"))
+        self.assertEqual(lazy["prose"], lazy["prose"])
+        self.assertEqual(calls, ["clinician"])
+
+
+if __name__ == '__main__':
+    unittest.main()
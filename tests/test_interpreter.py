@@ -2,9 +2,14 @@
 Unit tests for the DSL interpreter.
 """
 
+import hashlib
 import unittest
 import json
-from mddsl.interpreter import execute, InterpreterError, canonicalize_and_hash
+from unittest import mock
+from mddsl import interpreter
+from mddsl.interpreter import (
+    execute, execute_batch, compile_dsl, InterpreterError, canonicalize_and_hash,
+)
 from mddsl.dsl_parser import ParseError
 
 
@@ -86,6 +91,45 @@ class TestInterpreter(unittest.TestCase):
             entry2.pop("timestamp", None)
             self.assertEqual(entry1, entry2)
     
+    def test_compiled_dsl_matches_raw(self):
+        """Test that a precompiled DSL executes like the raw dictionary."""
+        compiled = compile_dsl(self.test_dsl)
+        self.assertEqual(compiled.rule_hash, canonicalize_and_hash(self.test_dsl))
+        self.assertEqual(compiled.entry_node["id"], "start")
+        
+        for case in (self.test_case, {"age": 40}):
+            raw_actions, raw_trace = execute(self.test_dsl, case)
+            actions, trace = execute(compiled, case)
+            self.assertEqual(actions, raw_actions)
+            for entry, raw_entry in zip(trace, raw_trace):
+                entry.pop("timestamp")
+                raw_entry.pop("timestamp")
+                self.assertEqual(entry, raw_entry)
+    
+    def test_compiled_dsl_cached_by_content(self):
+        """Test that equal DSLs share a compilation until the source changes."""
+        compiled = compile_dsl(self.test_dsl)
+        self.assertIs(compile_dsl(json.loads(json.dumps(self.test_dsl))), compiled)
+        
+        # Mutating the cached source must not leak into equal DSLs
+        copy = json.loads(json.dumps(self.test_dsl))
+        compiled.source["meta"]["version"] = "2.0.0"
+        recompiled = compile_dsl(copy)
+        self.assertIsNot(recompiled, compiled)
+        self.assertEqual(recompiled.version, copy["meta"]["version"])
+    
+    def test_execute_batch_matches_execute(self):
+        """Test that batch execution matches executing each case alone."""
+        cases = [self.test_case, {"age": 40}, {}]
+        results = execute_batch(self.test_dsl, cases)
+        self.assertEqual(len(results), len(cases))
+        
+        for case, (actions, trace) in zip(cases, results):
+            expected_actions, expected_trace = execute(self.test_dsl, case)
+            self.assertEqual(actions, expected_actions)
+            self.assertEqual([{k: v for k, v in entry.items() if k != "timestamp"} for entry in trace],
+                             [{k: v for k, v in entry.items() if k != "timestamp"} for entry in expected_trace])
+    
     def test_qc_fail_path(self):
         """Test QC_FAIL path as specified in requirements."""
         qc_fail_dsl = {
@@ -305,6 +349,31 @@ class TestInterpreter(unittest.TestCase):
         hash3 = canonicalize_and_hash(different_dsl)
         self.assertNotEqual(hash1, hash3)
     
+    def test_rule_hash_uses_canonical_json(self):
+        """Test that the hash covers sorted, compact, ASCII-escaped JSON."""
+        for extra in ({}, {"note": "édème", "threshold": 1e-05, "limit": 1e16, "goto": None}):
+            dsl = dict(self.test_dsl, **extra)
+            canonical = json.dumps(dsl, sort_keys=True, separators=(',', ':'))
+            expected = hashlib.blake2b(canonical.encode('utf-8'), digest_size=32).hexdigest()
+            self.assertEqual(canonicalize_and_hash(dsl), expected)
+    
+    def test_rule_hash_same_with_and_without_orjson(self):
+        """Test that the orjson and stdlib encoders give identical hashes."""
+        extras = [
+            {},
+            {"note": "édème", "threshold": 1e-05, "limit": 1e16, "goto": None},
+            {"weights": [0.1, 2.5e-07, float("nan"), float("inf"), -0.0], "id": 2 ** 70},
+            {"nested": {"b": [True, None, {"z": 1, "a": "\x7f"}], "a": 12345678901234567890}},
+        ]
+        for extra in extras:
+            dsl = dict(self.test_dsl, **extra)
+            with_default = canonicalize_and_hash(dsl)
+            with mock.patch.object(interpreter, "orjson", None):
+                without_orjson = canonicalize_and_hash(dsl)
+                canonical = interpreter._canonical_json(dsl)
+            self.assertEqual(with_default, without_orjson, extra)
+            self.assertEqual(canonical, json.dumps(dsl, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    
     def test_trace_includes_metadata(self):
         """Test that trace includes required metadata."""
         actions, trace = execute(self.test_dsl, self.test_case)
@@ -323,6 +392,9 @@ class TestInterpreter(unittest.TestCase):
             self.assertEqual(entry["version"], "1.0.0")
             self.assertIsInstance(entry["rule_hash"], str)
             self.assertIsInstance(entry["timestamp"], str)
+            
+            # Only safety stops carry a stop reason code
+            self.assertNotIn("outcome_code", entry)
     
     def test_citation_handling(self):
         """Test citation handling in trace."""
@@ -3,15 +3,19 @@ Unit tests for the DSL parser.
 """
 
 import unittest
-from mddsl.dsl_parser import parse, eval_expr, ParseError
+from mddsl.dsl_parser import (
+    parse, eval_expr, eval_expr_batch, compile_expr, ParseError,
+    BooleanNode, ComparisonNode, NotNode, AndChainNode, OrChainNode,
+)
 
 
 class TestParser(unittest.TestCase):
     """Test cases for the DSL parser."""
     
-    def setUp(self):
-        """Set up test case data."""
-        self.test_case = {
+    @classmethod
+    def setUpClass(cls):
+        """Set up test case data, shared because no test mutates it."""
+        cls.test_case = {
             "eye": "OD",
             "age": 62,
             "vision_reduced": True,
@@ -150,6 +154,10 @@ class TestParser(unittest.TestCase):
         with self.assertRaises(ParseError):
             eval_expr("missing.field", {})
         
+        # Walking through a non-object field should raise ParseError
+        with self.assertRaises(ParseError):
+            eval_expr("eye.side == null", self.test_case)
+        
         # Unclosed parentheses should raise ParseError
         with self.assertRaises(ParseError):
             eval_expr("(age > 60", {})
@@ -158,6 +166,12 @@ class TestParser(unittest.TestCase):
         with self.assertRaises(ParseError):
             eval_expr("age > 60)", {})
     
+    def test_unexpected_character_position(self):
+        """Test that tokenizer errors report the offending position."""
+        with self.assertRaises(ParseError) as ctx:
+            parse("age = 60")
+        self.assertEqual(ctx.exception.position, 4)
+    
     def test_parse_function(self):
         """Test the parse function returns AST."""
         ast = parse("age > 60 and vision_reduced == true")
@@ -167,6 +181,136 @@ class TestParser(unittest.TestCase):
         result = ast.eval(self.test_case)
         self.assertTrue(result)
     
+    def test_parse_cache_reuses_ast(self):
+        """Test that repeated parses of the same expression share one AST."""
+        ast1 = parse("age > 60 and vision_reduced == true")
+        ast2 = parse("age > 60 and vision_reduced == true")
+        self.assertIs(ast1, ast2)
+        
+        # Cached ASTs must not leak state between cases
+        self.assertTrue(ast1.eval({"age": 65, "vision_reduced": True}))
+        self.assertFalse(ast1.eval({"age": 50, "vision_reduced": True}))
+    
+    def test_compile_cache_is_bounded(self):
+        """Test that compiled callables are shared but not kept without limit."""
+        fn = compile_expr("age > 60 and vision_reduced == true")
+        self.assertIs(compile_expr("age > 60 and vision_reduced == true"), fn)
+        self.assertEqual(compile_expr.cache_info().maxsize, parse.cache_info().maxsize)
+        
+        for i in range(compile_expr.cache_info().maxsize + 10):
+            self.assertTrue(compile_expr(f"age < {i + 63}")(self.test_case))
+        self.assertLessEqual(compile_expr.cache_info().currsize, compile_expr.cache_info().maxsize)
+    
+    def test_constant_folding(self):
+        """Test that constant subtrees are folded without changing semantics."""
+        # Constant comparisons and logical identities collapse at parse time
+        self.assertIsInstance(parse("true and age > 60"), ComparisonNode)
+        self.assertIsInstance(parse("1 < 2 and not false"), BooleanNode)
+        
+        # Short-circuited sides are never evaluated, folded or not
+        self.assertFalse(eval_expr("false and missing.field", {}))
+        self.assertTrue(eval_expr("true or missing.field", {}))
+        
+        # Fields left of a constant are still evaluated and still fail
+        with self.assertRaises(ParseError):
+            eval_expr("missing.field and false", {})
+        with self.assertRaises(ParseError):
+            eval_expr("missing.field or true", {})
+    
+    def test_chain_flattening(self):
+        """Test that and/or runs are flattened into chains."""
+        ast = parse("a and b and (c and d) or e or f")
+        self.assertIsInstance(ast, OrChainNode)
+        self.assertEqual(len(ast.children), 3)
+        self.assertIsInstance(ast.children[0], AndChainNode)
+        self.assertEqual(len(ast.children[0].children), 4)
+        
+        # Long chains neither recurse nor lose short-circuiting
+        long_expr = " and ".join(f"age > {i}" for i in range(3000))
+        self.assertEqual(len(parse(long_expr).children), 3000)
+        self.assertFalse(eval_expr(long_expr, {"age": 10}))
+        self.assertFalse(eval_expr("age > 99 and missing.field", {"age": 10}))
+    
+    def test_chain_cost_ordering(self):
+        """Test that cheap operands move first only where order is unobservable."""
+        ast = parse("not (x == 1) and x != 2")
+        self.assertEqual(ast.children[0].cost, 2)
+        self.assertIsInstance(ast.children[1], NotNode)
+        
+        # Ordering comparisons can raise, so they pin their position
+        ast = parse("not (x == 1) and x > 2")
+        self.assertIsInstance(ast.children[0], NotNode)
+        with self.assertRaises(TypeError):
+            eval_expr("x == 1 or x > 2", {"x": "a"})
+        
+        # Operands reading different fields keep their order
+        ast = parse("not (x == 1) and y == 2")
+        self.assertIsInstance(ast.children[0], NotNode)
+    
+    def test_compiled_matches_ast(self):
+        """Test that compiled expressions agree with AST evaluation."""
+        expressions = [
+            "age > 60 and vision_reduced == true",
+            "not (age < 60) or qc.macula_view == false",
+            "macula.edema_prob >= 0.30 and macula.edema_prob <= 0.40",
+            "field1 > 0 or field1 == null",
+            "field1 != field2",
+            # Repeated fields under different short-circuit branches
+            "age < 50 or (qc.macula_view == true and qc.macula_view != null)",
+            "field1 == null or field1 > 0 and field1 < 5 or field1 == 7",
+        ]
+        cases = [
+            self.test_case,
+            {"age": 40, "vision_reduced": False, "qc": {"macula_view": True},
+             "macula": {"edema_prob": 0.9}, "field1": None, "field2": 0},
+        ]
+        for expr in expressions:
+            fn = compile_expr(expr)
+            for case in cases:
+                try:
+                    expected = bool(parse(expr).eval(case))
+                except ParseError:
+                    with self.assertRaises(ParseError):
+                        fn(case)
+                    continue
+                self.assertEqual(fn(case), expected, expr)
+    
+    def test_batch_evaluation(self):
+        """Test batch evaluation against per-case evaluation."""
+        cases = [
+            {"age": age, "vision_reduced": age % 2 == 0, "macula": {"edema_prob": age / 100}}
+            for age in range(55, 75)
+        ]
+        for expr in ("age > 60 and not vision_reduced or macula.edema_prob >= 0.70",
+                     "(age < 58 or vision_reduced) and (macula.edema_prob > 0.6 or not age > 65)",
+                     "not (age > 70 or vision_reduced and age < 60) == true"):
+            expected = [bool(eval_expr(expr, case)) for case in cases]
+            self.assertEqual([bool(v) for v in eval_expr_batch(expr, cases)], expected, expr)
+        
+        # Null values fall back to per-case evaluation with null semantics
+        null_cases = [{"age": None}, {"age": 65}]
+        self.assertEqual([bool(v) for v in eval_expr_batch("age > 60", null_cases)], [False, True])
+        self.assertEqual([bool(v) for v in eval_expr_batch("age == null", null_cases)], [True, False])
+        
+        # Missing fields still raise
+        with self.assertRaises(ParseError):
+            eval_expr_batch("missing.field > 1", cases)
+    
+    def test_batch_large_integers(self):
+        """Test that batch evaluation keeps integers beyond float64 precision exact."""
+        big = 2 ** 53
+        batches = [
+            ("x > 9007199254740992", [{"x": big + 1}, {"x": 0.5}]),
+            ("x > 9007199254740992", [{"x": big + 1}, {"x": 5}]),
+            ("x >= 0.5", [{"x": -big - 1}, {"x": 0.5}]),
+            # Literals that float64 would round onto the column's values
+            ("x == 9007199254740993", [{"x": big}, {"x": 1}]),
+            ("x < 9007199254740993", [{"x": big}, {"x": 0.5}]),
+        ]
+        for expr, cases in batches:
+            expected = [bool(eval_expr(expr, case)) for case in cases]
+            self.assertEqual([bool(v) for v in eval_expr_batch(expr, cases)], expected, (expr, cases))
+    
     def test_threshold_edge_cases(self):
         """Test threshold edge cases as specified in requirements."""
         edge_case = {
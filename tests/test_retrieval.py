@@ -0,0 +1,130 @@
+"""
+Unit tests for snippet retrieval.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from mddsl.retrieval import SnippetRetriever, _default_retriever
+
+
+class TestRetrieval(unittest.TestCase):
+    """Test cases for the TF-IDF snippet retriever."""
+    
+    def setUp(self):
+        """Write a small snippet corpus to a temporary directory."""
+        self.snippets_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snippets_dir)
+        
+        self.snippets = [
+            {"id": "DME", "source": "A", "line": "Suspected macular edema needs OCT.",
+             "short_quote": "DME: confirm with OCT."},
+            {"id": "NPDR", "source": "B", "line": "Moderate NPDR needs referral.",
+             "short_quote": "Refer moderate NPDR."},
+            {"id": "QC", "source": "C", "line": "Retake images that fail quality control.",
+             "short_quote": "QC fail: retake."},
+        ]
+        with open(os.path.join(self.snippets_dir, "test.jsonl"), "w", encoding="utf-8") as f:
+            for snippet in self.snippets:
+                f.write(json.dumps(snippet) + "\n")
+    
+    def test_search_ranks_by_relevance(self):
+        """Test that search returns matching snippets, best first."""
+        retriever = SnippetRetriever(self.snippets_dir)
+        
+        results = retriever.search("oct edema")
+        self.assertEqual([s["id"] for s in results], ["DME"])
+        
+        results = retriever.search("needs referral")
+        self.assertEqual(results[0]["id"], "NPDR")
+        
+        self.assertEqual(retriever.search("unrelated"), [])
+    
+    def test_incremental_updates_match_rebuild(self):
+        """Test that adding and removing snippets matches a fresh index."""
+        retriever = SnippetRetriever(self.snippets_dir)
+        added = {"id": "NEW", "line": "OCT referral for edema", "short_quote": "OCT"}
+        retriever.add_snippet(added)
+        retriever.remove_snippet("QC")
+        
+        rebuilt = SnippetRetriever(self.snippets_dir)
+        rebuilt.snippets.pop("QC")
+        rebuilt.snippets["NEW"] = added
+        rebuilt._build_tf_idf_index()
+        
+        self.assertEqual(retriever.tf_idf_index, rebuilt.tf_idf_index)
+        self.assertEqual(retriever.idf_scores, rebuilt.idf_scores)
+        for query in ("oct", "referral edema", "retake"):
+            self.assertEqual(retriever.search(query), rebuilt.search(query))
+    
+    def test_index_cache_reused_until_files_change(self):
+        """Test that the on-disk index cache is reused and invalidated."""
+        cache_path = os.path.join(self.snippets_dir, ".cache.pkl")
+        SnippetRetriever(self.snippets_dir)
+        self.assertFalse(os.path.exists(cache_path))
+        
+        first = SnippetRetriever(self.snippets_dir, use_cache=True)
+        self.assertTrue(os.path.exists(cache_path))
+        cached = SnippetRetriever(self.snippets_dir, use_cache=True)
+        self.assertEqual(cached.snippets, first.snippets)
+        self.assertEqual(cached.search("oct edema"), first.search("oct edema"))
+        
+        # Appending a snippet changes the file signature
+        with open(os.path.join(self.snippets_dir, "test.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "NEW", "line": "edema edema"}) + "\n")
+        refreshed = SnippetRetriever(self.snippets_dir, use_cache=True)
+        self.assertIn("NEW", refreshed.snippets)
+    
+    def test_unreadable_index_cache_is_rebuilt(self):
+        """Test that truncated, garbage or malformed caches fall back to a rebuild."""
+        cache_path = os.path.join(self.snippets_dir, ".cache.pkl")
+        fresh = SnippetRetriever(self.snippets_dir, use_cache=True)
+        with open(cache_path, "rb") as f:
+            valid = f.read()
+        
+        malformed = pickle.dumps({
+            "version": 1, "signature": fresh._files_signature(),
+            "snippets": [], "doc_terms": {}, "doc_lengths": {},
+            "postings": {}, "doc_order": {}, "next_order": 0,
+        })
+        for contents in (valid[:len(valid) // 2], bytes(range(256)) * 4,
+                         b"\x80\x05\x95garbage", malformed):
+            with open(cache_path, "wb") as f:
+                f.write(contents)
+            retriever = SnippetRetriever(self.snippets_dir, use_cache=True)
+            self.assertEqual(retriever.snippets, fresh.snippets)
+            self.assertEqual(retriever.search("oct edema"), fresh.search("oct edema"))
+            
+            # The rebuild replaces the bad cache with a loadable one
+            self.assertTrue(SnippetRetriever(self.snippets_dir)._load_index_cache())
+    
+    def test_default_retriever_resolves_relative_paths(self):
+        """Test that the shared retriever follows the working directory."""
+        self.addCleanup(_default_retriever.cache_clear)
+        self.addCleanup(os.chdir, os.getcwd())
+        
+        os.chdir(self.snippets_dir)
+        os.mkdir("snippets")
+        with open(os.path.join("snippets", "one.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "ONE", "line": "first corpus"}) + "\n")
+        first = _default_retriever()
+        self.assertIs(_default_retriever(), first)
+        self.assertIs(_default_retriever(os.path.abspath("snippets")), first)
+        
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+        os.chdir(other_dir)
+        self.assertIsNot(_default_retriever(), first)
+        self.assertEqual(list(first.snippets), ["ONE"])
+        self.assertEqual(_default_retriever().snippets, {})
+        
+        _default_retriever.cache_clear()
+        os.chdir(self.snippets_dir)
+        self.assertIsNot(_default_retriever(), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
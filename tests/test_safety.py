@@ -7,18 +7,55 @@ from mddsl.interpreter import execute, InterpreterError
 from mddsl.dsl_parser import ParseError
 
 
+def _index_trace(trace):
+    """Index a trace in one pass: its first safety stop and entries by node ID."""
+    index = {"safety_stop": None, "by_node_id": {}}
+    for entry in trace:
+        node_id = entry.get("node")
+        if node_id == "safety_stop" and index["safety_stop"] is None:
+            index["safety_stop"] = entry
+        index["by_node_id"].setdefault(node_id, entry)
+    return index
+
+
+def _chain_dsl(n_decisions, **meta):
+    """Build a chain of always-true decisions ending in one action node."""
+    nodes = [
+        {
+            "id": f"node_{i}",
+            "type": "decision",
+            "when": "age > 0",  # Always true
+            "goto_true": f"node_{i+1}" if i < n_decisions - 1 else "end"
+        }
+        for i in range(n_decisions)
+    ]
+    nodes.append({
+        "id": "end",
+        "type": "action",
+        "actions": [{"type": "set_followup", "interval": "12m"}]
+    })
+    return {"meta": dict({"profile": "test_profile", "version": "1.0.0"}, **meta), "nodes": nodes}
+
+
 class TestSafety(unittest.TestCase):
     """Test cases for safety mechanisms."""
     
-    def setUp(self):
-        """Set up test data."""
-        self.test_case = {
+    @classmethod
+    def setUpClass(cls):
+        """Set up test case data, shared because no test mutates it."""
+        cls.test_case = {
             "age": 65,
             "vision_reduced": True,
             "dr_grade": "moderate_npdr",
             "qc": {"fundus_pass": True, "macula_view": True},
             "macula": {"edema_prob": 0.75}
         }
+        
+        # Chains are built once; execute() never modifies a DSL.
+        # Max iterations is 100: the long chain needs more hops, while 99
+        # decisions plus the final action take exactly 100.
+        cls.long_chain_dsl = _chain_dsl(150, entry="start")
+        cls.exact_chain_dsl = _chain_dsl(99)
     
     def test_safety_stop_on_missing_entry_node(self):
         """Test safety stop when entry node is missing."""
@@ -42,11 +79,9 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_missing_entry, self.test_case)
         
         # Should have safety stop
-        safety_stop_found = any(
-            entry.get("node") == "safety_stop" and entry.get("type") == "safety_stop"
-            for entry in trace
-        )
-        self.assertTrue(safety_stop_found)
+        safety_stop = _index_trace(trace)["safety_stop"]
+        self.assertIsNotNone(safety_stop)
+        self.assertEqual(safety_stop["type"], "safety_stop")
         
         # Should have no actions
         self.assertEqual(len(actions), 0)
@@ -79,13 +114,10 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_parse_error, self.test_case)
         
         # Should have safety stop with interpreter_error
-        safety_stop_found = any(
-            entry.get("node") == "safety_stop" and 
-            entry.get("type") == "safety_stop" and
-            "interpreter_error" in str(entry.get("outcome", ""))
-            for entry in trace
-        )
-        self.assertTrue(safety_stop_found)
+        safety_stop = _index_trace(trace)["safety_stop"]
+        self.assertIsNotNone(safety_stop)
+        self.assertEqual(safety_stop["type"], "safety_stop")
+        self.assertEqual(safety_stop["outcome_code"], "interpreter_error")
     
     def test_safety_stop_on_cycle_detection(self):
         """Test safety stop on cycle detection."""
@@ -123,54 +155,28 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_with_cycle, self.test_case)
         
         # Should have safety stop for cycle
-        cycle_stop_found = any(
-            entry.get("node") == "safety_stop" and 
-            entry.get("type") == "safety_stop" and
-            "cycle_detected" in str(entry.get("outcome", ""))
-            for entry in trace
-        )
-        self.assertTrue(cycle_stop_found)
+        safety_stop = _index_trace(trace)["safety_stop"]
+        self.assertIsNotNone(safety_stop)
+        self.assertEqual(safety_stop["type"], "safety_stop")
+        self.assertEqual(safety_stop["outcome_code"], "cycle_detected")
     
     def test_safety_stop_on_max_iterations(self):
         """Test safety stop when max iterations exceeded."""
-        dsl_long_chain = {
-            "meta": {
-                "profile": "test_profile",
-                "version": "1.0.0",
-                "entry": "start"
-            },
-            "nodes": []
-        }
-        
-        # Create a very long chain of nodes (more than max_iterations)
-        for i in range(150):  # Max iterations is 100
-            node = {
-                "id": f"node_{i}",
-                "type": "decision",
-                "when": "age > 0",  # Always true
-                "goto_true": f"node_{i+1}" if i < 149 else "end"
-            }
-            dsl_long_chain["nodes"].append(node)
-        
-        # Add end node
-        dsl_long_chain["nodes"].append({
-            "id": "end",
-            "type": "action",
-            "actions": [
-                {"type": "set_followup", "interval": "12m"}
-            ]
-        })
-        
-        actions, trace = execute(dsl_long_chain, self.test_case)
+        actions, trace = execute(self.long_chain_dsl, self.test_case)
         
         # Should have safety stop for max iterations
-        max_iter_stop_found = any(
-            entry.get("node") == "safety_stop" and 
-            entry.get("type") == "safety_stop" and
-            "max_iterations_exceeded" in str(entry.get("outcome", ""))
-            for entry in trace
-        )
-        self.assertTrue(max_iter_stop_found)
+        safety_stop = _index_trace(trace)["safety_stop"]
+        self.assertIsNotNone(safety_stop)
+        self.assertEqual(safety_stop["type"], "safety_stop")
+        self.assertEqual(safety_stop["outcome_code"], "max_iterations_exceeded")
+    
+    def test_no_max_iterations_stop_when_finishing_on_last_hop(self):
+        """Test that a run ending exactly at the hop limit is not flagged."""
+        actions, trace = execute(self.exact_chain_dsl, self.test_case)
+        
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(len(trace), 100)
+        self.assertIsNone(_index_trace(trace)["safety_stop"])
     
     def test_safety_stop_on_missing_next_node(self):
         """Test safety stop when next node is missing."""
@@ -201,13 +207,10 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_missing_next, self.test_case)
         
         # Should have safety stop for missing node
-        missing_node_stop_found = any(
-            entry.get("node") == "safety_stop" and 
-            entry.get("type") == "safety_stop" and
-            "missing_node" in str(entry.get("outcome", ""))
-            for entry in trace
-        )
-        self.assertTrue(missing_node_stop_found)
+        safety_stop = _index_trace(trace)["safety_stop"]
+        self.assertIsNotNone(safety_stop)
+        self.assertEqual(safety_stop["type"], "safety_stop")
+        self.assertEqual(safety_stop["outcome_code"], "missing_node")
     
     def test_safety_stop_preserves_partial_trace(self):
         """Test that safety stops preserve partial execution trace."""
@@ -251,17 +254,13 @@ class TestSafety(unittest.TestCase):
         # Should have trace entries including safety stop
         self.assertGreater(len(trace), 1)
         
+        index = _index_trace(trace)
+        
         # Should have start node trace entry
-        start_trace_found = any(
-            entry.get("node") == "start" for entry in trace
-        )
-        self.assertTrue(start_trace_found)
+        self.assertIn("start", index["by_node_id"])
         
         # Should have safety stop
-        safety_stop_found = any(
-            entry.get("node") == "safety_stop" for entry in trace
-        )
-        self.assertTrue(safety_stop_found)
+        self.assertIsNotNone(index["safety_stop"])
     
     def test_safety_stop_error_details(self):
         """Test that safety stops include detailed error information."""
@@ -291,16 +290,12 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_with_error, self.test_case)
         
         # Find safety stop entry
-        safety_stop = None
-        for entry in trace:
-            if entry.get("node") == "safety_stop":
-                safety_stop = entry
-                break
+        safety_stop = _index_trace(trace)["safety_stop"]
         
         self.assertIsNotNone(safety_stop)
         self.assertEqual(safety_stop["type"], "safety_stop")
-        self.assertIn("interpreter_error", str(safety_stop.get("outcome", "")))
-        self.assertIn("nonexistent.field", str(safety_stop.get("outcome", "")))
+        self.assertEqual(safety_stop["outcome_code"], "interpreter_error")
+        self.assertIn("nonexistent.field", safety_stop["outcome"])
     
     def test_graceful_handling_of_invalid_node_structure(self):
         """Test graceful handling of nodes with invalid structure."""
@@ -374,11 +369,7 @@ class TestSafety(unittest.TestCase):
         actions, trace = execute(dsl_with_error, self.test_case)
         
         # Find safety stop entry
-        safety_stop = None
-        for entry in trace:
-            if entry.get("node") == "safety_stop":
-                safety_stop = entry
-                break
+        safety_stop = _index_trace(trace)["safety_stop"]
         
         self.assertIsNotNone(safety_stop)
         
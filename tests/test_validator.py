@@ -0,0 +1,169 @@
+"""
+Unit tests for case validation and DSL linting.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mddsl import _graph_kernels
+from mddsl.validator import CaseValidator, DSLValidator, validate_case, _fast_accepts
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; its tests are skipped without it
+    fastjsonschema = None
+
+
+class TestValidator(unittest.TestCase):
+    """Test cases for the case validator and DSL linter."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.linter = DSLValidator()
+        self.meta = {"profile": "test_profile", "version": "1.0.0", "entry": "a"}
+    
+    def _action(self, node_id, **links):
+        """Build an action node with the given links."""
+        node = {"id": node_id, "type": "action", "actions": [{"type": "abstain"}]}
+        node.update(links)
+        return node
+    
+    def test_valid_case_has_no_errors(self):
+        """Test that a well-formed case validates cleanly."""
+        case = {
+            "eye": "OD",
+            "age": 65,
+            "vision_reduced": True,
+            "dr_grade": "moderate_npdr",
+            "qc": {"fundus_pass": True, "macula_view": True},
+            "macula": {"edema_prob": 0.75}
+        }
+        validator = CaseValidator()
+        self.assertEqual(validator.validate_case(case), [])
+        self.assertTrue(validator.is_valid(case))
+        
+        del case["eye"]
+        self.assertEqual(validator.validate_case(case), ["root: 'eye' is a required property"])
+        self.assertFalse(validator.is_valid(case))
+    
+    @unittest.skipUnless(fastjsonschema, "fastjsonschema not installed")
+    def test_fast_validator_matches_draft7(self):
+        """Test that the compiled schema check agrees with Draft7Validator."""
+        case = {
+            "eye": "OD",
+            "age": 62,
+            "vision_reduced": True,
+            "dr_grade": "moderate_npdr",
+            "qc": {"fundus_pass": True, "macula_view": True},
+            "macula": {"edema_prob": 0.75}
+        }
+        validator = CaseValidator()
+        self.assertIsNotNone(validator._fast)
+        
+        # Integral floats and null grades are valid, booleans are not integers
+        for field, value, valid in [(None, None, True), ("age", 62.0, True),
+                                    ("age", True, False), ("dr_grade", None, True),
+                                    ("eye", "left", False)]:
+            variant = dict(case)
+            if field is not None:
+                variant[field] = value
+            draft7_valid = next(validator.validator.iter_errors(variant), None) is None
+            self.assertEqual(draft7_valid, valid, (field, value))
+            self.assertEqual(_fast_accepts(validator._fast, variant), valid, (field, value))
+            self.assertEqual(validator.is_valid(variant), valid, (field, value))
+            self.assertEqual(validator.validate_case(variant) == [], valid, (field, value))
+        
+        # A rejection from the compiled check is confirmed by Draft7
+        def reject_all(instance):
+            raise fastjsonschema.JsonSchemaException("rejected")
+        
+        validator._fast = reject_all
+        self.assertTrue(validator.is_valid(case))
+        self.assertEqual(validator.validate_case(case), [])
+    
+    def test_validate_case_picks_up_edited_schema(self):
+        """Test that the convenience function rereads a schema after it changes."""
+        schema_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, schema_dir)
+        schema_path = os.path.join(schema_dir, "schema.json")
+        
+        def write_schema(required, mtime):
+            with open(schema_path, "w", encoding="utf-8") as f:
+                json.dump({"type": "object", "required": required}, f)
+            os.utime(schema_path, (mtime, mtime))
+        
+        write_schema(["eye"], 1_000_000)
+        self.assertEqual(validate_case({"eye": "OD"}, schema_path), [])
+        
+        write_schema(["eye", "age"], 2_000_000)
+        self.assertEqual(validate_case({"eye": "OD"}, schema_path),
+                         ["root: 'age' is a required property"])
+    
+    def test_lint_reports_missing_and_duplicate_nodes(self):
+        """Test missing references and duplicate IDs."""
+        dsl = {
+            "meta": self.meta,
+            "nodes": [
+                self._action("a", next="b"),
+                self._action("b", next="nowhere"),
+                self._action("b")
+            ]
+        }
+        warnings = self.linter.lint_rules(dsl)
+        self.assertIn("DUPLICATE_ID: Duplicate node ID 'b'", warnings)
+        self.assertIn("MISSING_NODE: Node 'b' references missing next node 'nowhere'", warnings)
+    
+    def test_lint_reports_repeated_warnings_once(self):
+        """Test that identical warnings are not repeated."""
+        node = self._action("a")
+        node["actions"] = [{"type": "teleport"}, {"type": "teleport"}]
+        dsl = {"meta": self.meta, "nodes": [node]}
+        unknown = [w for w in self.linter.lint_rules(dsl) if w.startswith("UNKNOWN_ACTION_TYPE")]
+        self.assertEqual(unknown, ["UNKNOWN_ACTION_TYPE: Node 'a' has unknown action type 'teleport'"])
+    
+    def test_lint_reports_each_cycle_once(self):
+        """Test that each cyclic component yields a single warning."""
+        dsl = {
+            "meta": self.meta,
+            "nodes": [
+                self._action("a", next="c"),
+                self._action("c", next="b"),
+                self._action("b", next="a"),
+                self._action("d", next="d")
+            ]
+        }
+        cycles = [w for w in self.linter.lint_rules(dsl) if w.startswith("CYCLE_DETECTED")]
+        self.assertEqual(sorted(cycles), [
+            "CYCLE_DETECTED: Cycle found among nodes: a, b, c",
+            "CYCLE_DETECTED: Cycle found among nodes: d"
+        ])
+    
+    def test_lint_handles_long_chains(self):
+        """Test that linting a long chain neither recurses nor warns."""
+        n = 5000
+        nodes = [self._action(f"n{i}", next=f"n{i + 1}") for i in range(n - 1)]
+        nodes.append(self._action(f"n{n - 1}"))
+        dsl = {"meta": dict(self.meta, entry="n0"), "nodes": nodes}
+        self.assertEqual(self.linter.lint_rules(dsl), [])
+    
+    @unittest.skipUnless(_graph_kernels.HAVE_NUMBA, "numba not installed")
+    def test_cycle_kernel_matches_python(self):
+        """Test that the compiled cycle search finds the same components."""
+        graph = {
+            "a": ["b", "missing"],
+            "b": ["c"],
+            "c": ["a", "d"],
+            "d": ["d"],
+            "e": ["a"],
+            "f": ["g"],
+            "g": ["f", "e"]
+        }
+        expected = [["d"], ["a", "b", "c"], ["f", "g"]]
+        self.assertEqual(self.linter._find_cycles(graph), expected)
+        self.assertEqual(self.linter._find_cycles_kernel(graph), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()